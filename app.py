@@ -1,32 +1,61 @@
 import sys
 import os
+import json
+import time
 import shutil
 import logging
+import logging.handlers
+import math
+import re
+import bisect
+import functools
+import itertools
+import hashlib
+import argparse
 import tempfile
 import platform
+import threading
 import subprocess
+import collections
+import contextlib
+from typing import Callable
+from fractions import Fraction
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# NOTE: importing numpy and Qt is the slowest part of the startup, see StartupProfile
+STARTUP_TIME = time.perf_counter()
+
+import numpy as np
 
 from PySide6.QtCore import (
+    QAbstractListModel,
     QMimeDatabase,
+    QModelIndex,
     QObject,
     QUrl,
     Qt,
     QSize,
     QPoint,
-    QRectF,
     QSettings,
+    QStandardPaths,
     QTimer,
     QThread,
+    QThreadPool,
+    QEvent,
     Signal,
 )
 from PySide6.QtGui import (
     QDragEnterEvent,
     QDropEvent,
     QGuiApplication,
+    QImage,
     QImageReader,
+    QImageIOHandler,
     QPixmap,
     QPainter,
     QResizeEvent,
+    QShowEvent,
+    QHideEvent,
     QDesktopServices,
     QIcon,
     QFontDatabase,
@@ -39,149 +68,1118 @@ from PySide6.QtWidgets import (
     QBoxLayout,
     QVBoxLayout,
     QHBoxLayout,
+    QProgressBar,
     QSpacerItem,
     QWidget,
-    QListWidget,
+    QListView,
     QLabel,
     QPushButton,
-    QListWidgetItem,
     QFileDialog,
     QMessageBox,
     QSizePolicy,
-    QGraphicsBlurEffect,
-    QGraphicsScene,
-    QGraphicsPixmapItem,
     QDoubleSpinBox,
     QCheckBox,
+    QComboBox,
     QDialog,
     QPlainTextEdit,
-)
-from PySide6.QtMultimedia import (
-    QMediaPlayer,
-    QAudioOutput,
-    QAudioDevice,
+    QMenu,
 )
 
 
 # Globals
 VIDEO_FILTER = """
-split [main][tmp];
-[tmp]scale=hd1080,setsar=1,boxblur=20:20[b];
-[main]scale=1920:1080:force_original_aspect_ratio=decrease:eval=frame[v];
-[b][v]overlay=(W-w)/2:(H-h)/2:eval=frame
+[{input}]split [{label}main][{label}tmp];
+[{label}tmp]scale={width}:{height},setsar=1,boxblur={blur}:{blur}[{label}b];
+[{label}main]scale={width}:{height}:force_original_aspect_ratio=decrease:eval=frame[{label}v];
+[{label}b][{label}v]overlay=(W-w)/2:(H-h)/2:eval=frame[{label}video]
 """.strip()
+AUDIO_FILTER = "[1:a]afade=in:st=0:d={},afade=out:st={}:d={}[audio]"
+VIDEO_SIZE = QSize(1920, 1080)
+EXPORT_PROFILES = {
+    # NOTE: standard matches the libx264 defaults (medium, crf 23) the export always used
+    "draft": {"size": QSize(1280, 720), "preset": "ultrafast", "crf": 28, "tune": "stillimage", "threads": 0, "fps": 15},
+    "standard": {"size": VIDEO_SIZE, "preset": "medium", "crf": 23, "tune": "", "threads": 0, "fps": 30},
+    "archival": {"size": QSize(3840, 2160), "preset": "slow", "crf": 18, "tune": "stillimage", "threads": 0, "fps": 30},
+    "vertical": {"size": QSize(1080, 1920), "preset": "medium", "crf": 23, "tune": "", "threads": 0, "fps": 30},
+}
+DEFAULT_PROFILE = "standard"
+BLUR_SIGMA_FACTOR = 0.4  # Gaussian sigma per unit of QGraphicsBlurEffect radius (measured)
+HASH_SIZE = QSize(64, 64)  # Decode size for perceptual_hash, JPEGs are scaled down during the DCT
+HASH_COLOR_TOLERANCE = 16  # Largest difference per channel of the average colors of duplicates (0-255)
+HASH_INDEX_VERSION = 2
+PAM_HEADER = "P7\nWIDTH {}\nHEIGHT {}\nDEPTH 4\nMAXVAL 255\nTUPLTYPE RGB_ALPHA\nENDHDR\n"
+PROJECT_VERSION = 1
+SLIDE_DURATION_RANGE = (0.1, 60.0)  # Seconds per slide, the exports round shorter slides to zero frames
 TMP_DIR = ""
 basedir = os.path.dirname(__file__)
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+logging.basicConfig(level=logging.DEBUG, format=LOG_FORMAT)
 logger = logging.getLogger()
 
 
+class Tracer:
+    def __init__(self) -> None:
+        # NOTE: disabled spans share a single no-op context, see span()
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.events: list[dict] = []
+        self.threads: dict[int, str] = {}
+        self.origin = time.perf_counter()
+
+    def span(self, name: str, **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return self.record(name, args)
+
+    @contextlib.contextmanager
+    def record(self, name: str, args: dict):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            thread = threading.current_thread()
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": round((start - self.origin) * 1000000, 1),
+                "dur": round((end - start) * 1000000, 1),
+                "pid": os.getpid(),
+                "tid": thread.ident,
+            }
+            if args:
+                event["args"] = args
+            with self.lock:
+                self.events.append(event)
+                self.threads.setdefault(thread.ident, thread.name)
+
+    def summary(self):
+        # Total, count, mean and max per span name, slowest first
+        stages: dict[str, list[float]] = {}
+        with self.lock:
+            for event in self.events:
+                stages.setdefault(event["name"], []).append(event["dur"] / 1000)
+        rows = [(name, sum(times), len(times), max(times)) for name, times in stages.items()]
+        rows.sort(key=lambda row: row[1], reverse=True)
+        lines = [f"{'stage':<20} {'count':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"]
+        for name, total, count, longest in rows:
+            lines.append(f"{name:<20} {count:>7} {total:>10.1f} {total / count:>9.2f} {longest:>9.2f}")
+        return "\n".join(lines)
+
+    def write(self, path: str):
+        # Chrome trace event format, open it in chrome://tracing or https://ui.perfetto.dev
+        with self.lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+        for tid, name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}})
+        partial = f"{path}.partial"
+        with open(partial, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        os.replace(partial, path)
+        logger.info(f"Wrote {len(events)} trace events to {path}")
+
+
+NULL_SPAN = contextlib.nullcontext()
+tracer = Tracer()
+
+
 def format_decimals(value: float, decimals: int):
     return f"{{:.{decimals}f}}".format(value)
 
 
-def generate_video(images: list[str], duration: float, music: str, fade_in: bool, fade_out: bool, output: str):
-    total_duration = int(duration * len(images))
-    fade_in_duration = 1 if fade_in else 0
-    fade_out_duration = 2 if fade_out else 0
-    fade_out_start = total_duration - fade_out_duration
-    if fade_out_start < 1:
-        fade_out_start = total_duration
-        fade_out_duration = 0
-
+def find_ffmpeg():
     if platform.system() == "Darwin":
         ffmpeg_name = f"ffmpeg-darwin-{platform.machine()}"
     elif platform.system() == "Windows":
         ffmpeg_name = "ffmpeg-win32-x64.exe"
     else:
-        return "Unsupported platform: " + platform.platform()
+        ffmpeg_name = f"ffmpeg-linux-{platform.machine()}"
     ffmpeg = os.path.join(basedir, "data", ffmpeg_name)
     if not os.path.exists(ffmpeg):
         ffmpeg = shutil.which("ffmpeg")
         if ffmpeg is None:
             # NOTE: You are probably missing the executables in the data folder
-            return "Could not find ffmpeg executable"
-        logger.warning("Using system ffmpeg: {}", ffmpeg)
+            return None, "Could not find ffmpeg executable"
+        logger.warning(f"Using system ffmpeg: {ffmpeg}")
+    return ffmpeg, None
+
+
+def ffmpeg_escape(path):
+    escaped = ""
+    for ch in path:
+        if ch == "\\":
+            escaped += "/"
+        elif ch == " ":
+            escaped += "\\ "
+        elif ch == "'":
+            escaped += "\\'"
+        else:
+            escaped += ch
+    return escaped
 
-    if music:
-        stem, _ = os.path.splitext(os.path.basename(output))
-        output_noaudio = os.path.join(os.path.dirname(output), f"{stem}.noaudio.mp4")
+
+def parse_number(value: str, default: float = 0.0):
+    try:
+        return float(value.rstrip("x"))
+    except ValueError:  # N/A
+        return default
+
+
+def parse_progress(stage: str, values: dict[str, str], duration: float, elapsed: float):
+    # See the -progress option in the ffmpeg documentation for the keys
+    out_time = parse_number(values.get("out_time_us", "0")) / 1000000
+    percent = 0.0
+    eta = None
+    if duration > 0:
+        percent = min(100.0, out_time / duration * 100)
+        if out_time > 0:
+            eta = max(0.0, elapsed * (duration - out_time) / out_time)
+    return {
+        "stage": stage,
+        "frame": int(parse_number(values.get("frame", "0"))),
+        "fps": parse_number(values.get("fps", "0")),
+        "speed": parse_number(values.get("speed", "0")),
+        "bitrate": values.get("bitrate", "N/A").strip(),
+        "out_time": out_time,
+        "percent": percent,
+        "eta": eta,
+        "elapsed": elapsed,
+        "done": values.get("progress") == "end",
+    }
+
+
+def progress_text(progress: dict):
+    text = f"{progress['percent']:.0f}%"
+    if progress["speed"] > 0:
+        text += f", {progress['speed']:.1f}x"
+    if progress["eta"] is not None:
+        minutes, seconds = divmod(int(progress["eta"] + 0.5), 60)
+        text += f", ETA {minutes}:{seconds:02}"
+    return text
+
+
+def run_ffmpeg(ffmpeg: str, args: str, name: str, feed=None, progress: Callable[[dict], None] = None, duration: float = 0.0):
+    command = f'"{ffmpeg}" -nostats -progress pipe:1 {args}'
+    logger.info(f"[ffmpeg] command {name}: {command}")
+    with tracer.span("ffmpeg", run=name):
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL if feed is None else subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            shell=True,
+        )
+
+        # Both pipes are read on separate threads, otherwise ffmpeg blocks when one of them fills up
+        def read_log():
+            for line in process.stderr:
+                line = line.decode(errors="ignore").rstrip()
+                if line:
+                    logger.info(f"[ffmpeg] {line}")
+
+        def read_progress():
+            values: dict[str, str] = {}
+            for line in process.stdout:
+                key, _, value = line.decode(errors="ignore").strip().partition("=")
+                values[key] = value
+                # Every block of values ends with progress=continue or progress=end
+                if key == "progress":
+                    if progress is not None:
+                        progress(parse_progress(name, values, duration, time.perf_counter() - start))
+                    values = {}
+
+        readers = [threading.Thread(target=read_log), threading.Thread(target=read_progress)]
+        for reader in readers:
+            reader.start()
+        error = None
+        if feed is not None:
+            try:
+                error = feed(process.stdin)
+            except OSError as x:
+                # NOTE: ffmpeg closes the pipe when it fails (see the exit code) or when -shortest ends the output early
+                logger.warning(f"[ffmpeg] stopped reading input: {x}")
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+        returncode = process.wait()
+        for reader in readers:
+            reader.join()
+        logger.info(f"[ffmpeg] exit code: {returncode}\n==========")
+        logger.info(f"[timing] ffmpeg ({name}): {time.perf_counter() - start:.2f}s")
+        return returncode, error
+
+
+def ordered_map(pool: ThreadPoolExecutor, fn, items, window: int):
+    # Like pool.map, but only keeps `window` results in flight to bound the memory usage
+    pending = collections.deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def read_scaled(path: str, size: QSize):
+    # NOTE: runs on worker threads, so only QImage can be used here (QPixmap is GUI-thread only)
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    if not reader.canRead():
+        return None, reader.errorString()
+    # Ask the decoder for the bounded size directly (JPEG scales down during the DCT)
+    source_size = reader.size()
+    if source_size.isValid():
+        bounds = QSize(size)
+        if reader.transformation() & QImageIOHandler.Transformation.TransformationRotate90:
+            # The scaled size applies before the EXIF orientation is applied
+            bounds.transpose()
+        if source_size.width() > bounds.width() or source_size.height() > bounds.height():
+            reader.setScaledSize(source_size.scaled(bounds, Qt.AspectRatioMode.KeepAspectRatio))
+    with tracer.span("decode"):
+        image = reader.read()
+    if image.isNull():
+        return None, reader.errorString()
+    # Fallback for formats that do not report their size up front
+    if image.width() > size.width() or image.height() > size.height():
+        with tracer.span("scale"):
+            image = image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    return image, None
+
+
+def convert_image(image: str, tmp_image: str, size: QSize = VIDEO_SIZE, compose: bool = False):
+    converted, error = read_scaled(image, size)
+    if error is not None:
+        return error
+    if compose:
+        converted = compose_image(converted, size).convertToFormat(QImage.Format.Format_RGB32)
+    # Save under a temporary name first, a concurrent export might be using the same cache entry
+    partial = f"{tmp_image}.{threading.get_ident()}.partial"
+    with tracer.span("save jpeg"):
+        saved = converted.save(partial, "JPG")
+    if not saved:
+        return f"Failed to save {tmp_image}"
+    os.replace(partial, tmp_image)
+    return None
+
+
+@functools.cache
+def image_extensions():
+    # NOTE: the list depends on the installed Qt image format plugins
+    return frozenset(bytes(format).decode().lower() for format in QImageReader.supportedImageFormats())
+
+
+def is_image_file(path: str, mimedb: QMimeDatabase = None):
+    # Cheap check on the extension, the contents are only read for files without an extension
+    name = os.path.basename(path)
+    if name.startswith("."):
+        # Hidden files, like the ._IMG_0001.JPG resource forks macOS leaves on USB drives
+        return False
+    _, extension = os.path.splitext(name)
+    if extension:
+        return extension[1:].lower() in image_extensions()
+    if mimedb is None:
+        return True
+    return mimedb.mimeTypeForFile(path, QMimeDatabase.MatchMode.MatchContent).name().startswith("image/")
+
+
+def natural_key(name: str):
+    # IMG_2.jpg sorts before IMG_10.jpg
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def scan_images(paths: list[str], mimedb: QMimeDatabase, interrupted: Callable[[], bool]):
+    # Yields the image files in paths, folders are walked recursively in natural name order
+    def walk(directory: str):
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: natural_key(entry.name))
+        except OSError as x:
+            logger.warning(f"Could not read {directory}: {x.strerror}")
+            return
+        for entry in entries:
+            if interrupted():
+                return
+            # NOTE: symbolic links to folders are skipped, they can form loops
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk(entry.path)
+            elif entry.is_file() and is_image_file(entry.path, mimedb):
+                yield entry.path
+
+    for path in paths:
+        if interrupted():
+            return
+        if os.path.isdir(path):
+            yield from walk(path)
+        elif os.path.isfile(path) and is_image_file(path, mimedb):
+            yield path
+
+
+def parse_exif_time(tiff: bytes):
+    order = {b"II": "little", b"MM": "big"}.get(tiff[:2])
+    if order is None:
+        return None
+
+    def integer(offset: int, size: int):
+        return int.from_bytes(tiff[offset:offset + size], order)
+
+    def entries(offset: int):
+        # Tag -> (type, count, offset of the value or of the pointer to the value)
+        result = {}
+        if offset + 2 > len(tiff):
+            return result
+        for i in range(integer(offset, 2)):
+            entry = offset + 2 + i * 12
+            if entry + 12 > len(tiff):
+                break
+            result[integer(entry, 2)] = (integer(entry + 2, 2), integer(entry + 4, 4), entry + 8)
+        return result
+
+    def text(entry):
+        kind, count, value = entry
+        if kind != 2:  # ASCII
+            return None
+        if count > 4:
+            value = integer(value, 4)
+        return tiff[value:value + count].rstrip(b"\0").decode("ascii", errors="ignore")
+
+    ifd0 = entries(integer(4, 4))
+    exif = entries(integer(ifd0[0x8769][2], 4)) if 0x8769 in ifd0 else {}
+    # DateTimeOriginal, with the modification DateTime as a fallback
+    for tags, tag in [(exif, 0x9003), (ifd0, 0x0132)]:
+        if tag in tags:
+            value = text(tags[tag])
+            # NOTE: unknown dates are stored as "0000:00:00 00:00:00" or blanks
+            if value and len(value) == 19 and value[0].isdigit() and not value.startswith("0000"):
+                return value
+    return None
+
+
+def exif_capture_time(path: str):
+    # Reads the capture time from the JPEG header, the image data is not decoded.
+    # Returns "YYYY:MM:DD HH:MM:SS" (the EXIF format sorts as text), or None.
+    try:
+        with open(path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return None
+            while True:
+                marker = f.read(4)
+                if len(marker) < 4 or marker[0] != 0xFF:
+                    return None
+                length = int.from_bytes(marker[2:4], "big")
+                if length < 2:
+                    # The length includes its own two bytes, the file is corrupt
+                    return None
+                if marker[1] == 0xE1:  # APP1
+                    data = f.read(length - 2)
+                    if data.startswith(b"Exif\0\0"):
+                        return parse_exif_time(data[6:])
+                elif marker[1] in (0xD9, 0xDA):  # end of image, start of scan
+                    return None
+                else:
+                    f.seek(length - 2, os.SEEK_CUR)
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def capture_time(path: str):
+    # The EXIF capture time, or the modification time for images without one
+    value = exif_capture_time(path)
+    if value is None:
+        try:
+            value = time.strftime("%Y:%m:%d %H:%M:%S", time.localtime(os.path.getmtime(path)))
+        except OSError:
+            value = ""
+    return value
+
+
+def box_blur(pixels: np.ndarray, radius: int, axis: int):
+    # Moving average over 2 * radius + 1 pixels using a prefix sum, the edges fade to transparent
+    width = 2 * radius + 1
+    length = pixels.shape[axis]
+    padding = [(0, 0)] * pixels.ndim
+    padding[axis] = (radius + 1, radius)
+    prefix = np.cumsum(np.pad(pixels, padding), axis=axis)
+    upper = np.take(prefix, range(width, length + width), axis=axis)
+    lower = np.take(prefix, range(0, length), axis=axis)
+    return (upper - lower) / width
+
+
+def blur_image(image: QImage, radius: float, size: QSize = None):
+    # Stretches the image to size (default: the image size) and blurs it.
+    # The radius is in the same units as QGraphicsBlurEffect.
+    if size is None:
+        size = image.size()
+    sigma = radius * BLUR_SIGMA_FACTOR
+    # Downsample first so the blur works with a kernel of a few pixels
+    scale = max(1.0, sigma / 3)
+    width = max(1, round(size.width() / scale))
+    height = max(1, round(size.height() / scale))
+    small = image.scaled(width, height, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    small = small.convertToFormat(QImage.Format.Format_RGBA8888_Premultiplied)
+    pixels = np.frombuffer(small.constBits(), np.uint8).reshape(height, width, 4).astype(np.float32)
+
+    # Three box blurs approximate a gaussian blur
+    sigma /= scale
+    box_radius = max(1, round((math.sqrt(4 * sigma * sigma + 1) - 1) / 2))
+    for _ in range(3):
+        pixels = box_blur(pixels, box_radius, 1)
+        pixels = box_blur(pixels, box_radius, 0)
+
+    pixels = np.ascontiguousarray(np.clip(pixels + 0.5, 0, 255).astype(np.uint8))
+    blurred = QImage(pixels.data, width, height, width * 4, QImage.Format.Format_RGBA8888_Premultiplied).copy()
+    return blurred.scaled(size, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+
+def compose_image(image: QImage, size: QSize):
+    # NOTE: runs on worker threads too, QPainter on a QImage is thread-safe
+    # Blur the stretched for the background (the same as blurring with a radius of 50 and then 20)
+    with tracer.span("blur"):
+        blurred = blur_image(image, math.hypot(50, 20), size)
+
+    # Resize the main image
+    with tracer.span("scale"):
+        if image.height() > size.height():
+            image = image.scaledToHeight(size.height(), Qt.TransformationMode.SmoothTransformation)
+        if image.width() > size.width():
+            image = image.scaledToWidth(size.width(), Qt.TransformationMode.SmoothTransformation)
+
+    # Draw the final result
+    with tracer.span("compose"):
+        result = QImage(size, QImage.Format.Format_ARGB32_Premultiplied)
+        result.fill(Qt.GlobalColor.transparent)
+        with QPainter(result) as painter:
+            painter.drawImage(QPoint(0, 0), blurred)
+            midx = (size.width() - image.width()) // 2
+            midy = (size.height() - image.height()) // 2
+            painter.drawImage(QPoint(midx, midy), image)
+    return result
+
+
+def perceptual_hash(image: QImage):
+    # dHash: one bit per pixel of a 9x8 grayscale thumbnail, set when it is brighter than its left neighbour.
+    # Scaled and recompressed copies get (nearly) the same 64 bits.
+    small = image.scaled(9, 8, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    color = small.convertToFormat(QImage.Format.Format_RGB888)
+    rgb = np.frombuffer(color.constBits(), np.uint8).reshape(8, color.bytesPerLine())[:, :27].reshape(8, 9, 3)
+    gray = small.convertToFormat(QImage.Format.Format_Grayscale8)
+    pixels = np.frombuffer(gray.constBits(), np.uint8).reshape(8, gray.bytesPerLine())[:, :9]
+    bits = int.from_bytes(np.packbits(pixels[:, 1:] > pixels[:, :-1]).tobytes(), "big")
+    # The gradients of flat and smoothly shaded slides are all the same, the average colors of the
+    # quarters (bits 64-159, one byte per channel) tell them apart
+    colors = 0
+    for quarter in [rgb[:4, :4], rgb[:4, 5:], rgb[4:, :4], rgb[4:, 5:]]:
+        for value in quarter.reshape(-1, 3).mean(axis=0).round():
+            colors = colors << 8 | int(value)
+    return bits | colors << 64
+
+
+def similar_colors(hash: int, other: int):
+    # Compares the average colors of two perceptual hashes, see perceptual_hash
+    return all(abs((hash >> shift & 0xFF) - (other >> shift & 0xFF)) <= HASH_COLOR_TOLERANCE for shift in range(64, 160, 8))
+
+
+class HammingIndex:
+    # Multi-index hashing: the hashes are split into distance + 1 chunks, two hashes within the distance
+    # have at least one identical chunk. Only the hashes in the same buckets are compared.
+    # NOTE: a BK-tree visits most of its nodes for 64-bit hashes
+    def __init__(self, distance: int) -> None:
+        self.distance = distance
+        self.chunks: list[tuple[int, int]] = []
+        shift = 0
+        for i in range(distance + 1):
+            bits = 64 // (distance + 1) + (1 if i < 64 % (distance + 1) else 0)
+            self.chunks.append((shift, (1 << bits) - 1))
+            shift += bits
+        self.tables: list[dict[int, list[int]]] = [{} for _ in self.chunks]
+        self.hashes: list[int] = []
+
+    def add(self, hash: int):
+        # Returns the indices of the earlier hashes within the distance
+        candidates = set()
+        for (shift, mask), table in zip(self.chunks, self.tables):
+            bucket = table.setdefault((hash >> shift) & mask, [])
+            candidates.update(bucket)
+            bucket.append(len(self.hashes))
+        self.hashes.append(hash)
+        return [index for index in candidates if (self.hashes[index] ^ hash).bit_count() <= self.distance]
+
+
+def duplicate_groups(hashes: list[int], distance: int):
+    # Groups the rows with (nearly) the same hash, None is a row without a hash.
+    # The groups and the rows in them are in row order.
+    index = HammingIndex(distance)
+    rows: list[int] = []
+    parent: dict[int, int] = {}
+
+    def find(row: int):
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    for row, hash in enumerate(hashes):
+        if hash is None:
+            continue
+        parent[row] = row
+        for match in index.add(hash & 0xFFFFFFFFFFFFFFFF):
+            if not similar_colors(hash, hashes[rows[match]]):
+                continue
+            root, other = find(row), find(rows[match])
+            parent[max(root, other)] = min(root, other)
+        rows.append(row)
+    groups: dict[int, list[int]] = {}
+    for row in rows:
+        groups.setdefault(find(row), []).append(row)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+class ConversionCache:
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, image: str, size: QSize | None, format: str = "jpg", params: str = ""):
+        # The key changes whenever the source file or the conversion settings change
+        stat = os.stat(image)
+        key = f"{os.path.abspath(image)}|{stat.st_mtime_ns}|{stat.st_size}|{format}"
+        if size is not None:
+            key += f"|{size.width()}x{size.height()}"
+        if params:
+            key += f"|{params}"
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.{format}")
+
+    def lookup(self, path: str):
+        if os.path.exists(path):
+            # The modification time is used as the last access time for the LRU eviction
+            os.utime(path)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def evict(self):
+        entries = []
+        total_size = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+        # Remove the least recently used entries until the cache fits in the budget
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            self.evictions += 1
+        return total_size
+
+
+def read_frame(image: str, size: QSize = VIDEO_SIZE, compose: bool = False):
+    frame, error = read_scaled(image, size)
+    if error is not None:
+        return None, error
+    if compose:
+        # NOTE: the blurred edges are partly transparent, dropping the premultiplied alpha puts them on black
+        return compose_image(frame, size).convertToFormat(QImage.Format.Format_RGBX8888), None
+    return frame.convertToFormat(QImage.Format.Format_RGBA8888), None
+
+
+def write_frame(pipe, frame: QImage):
+    # NOTE: the span includes the time spent waiting for ffmpeg to read the frame
+    with tracer.span("write frame"):
+        pipe.write(PAM_HEADER.format(frame.width(), frame.height()).encode())
+        # NOTE: 32-bit scanlines are never padded, so the pixel buffer is passed to the pipe without a copy
+        pipe.write(frame.constBits())
+
+
+def video_graph(size: QSize, input: str = "0:v", label: str = ""):
+    # The background blur is 20 pixels at 1080p, scale it with the output
+    blur = max(1, round(20 * size.height() / VIDEO_SIZE.height()))
+    # The label prefixes the pads, so the graphs of several outputs can share one filter graph
+    return VIDEO_FILTER.format(input=input, label=label, width=size.width(), height=size.height(), blur=blur)
+
+
+def video_codecs(settings: dict, threads: int = 0):
+    codecs = f"-c:v libx264 -preset {settings['preset']} -crf {settings['crf']}"
+    if settings["tune"]:
+        codecs += f" -tune {settings['tune']}"
+    threads = threads or settings["threads"]
+    if threads > 0:
+        codecs += f" -threads {threads}"
+    return codecs + f" -r {settings['fps']} -pix_fmt yuv420p"
+
+
+def encode_segment(ffmpeg: str, image: str, target: str, size: QSize, settings: dict, frames: int, threads: int, compose: bool = False):
+    # Encodes a single slide, the segments are joined without re-encoding (see generate_video)
+    frame, error = read_frame(image, size, compose)
+    if error is not None:
+        return error
+    # The one input frame is repeated until the segment is long enough
+    if compose:
+        graph = "[0:v]tpad=stop=-1:stop_mode=clone[segment]"
     else:
-        output_noaudio = output
-
-    def ffmpeg_escape(path):
-        escaped = ""
-        for ch in path:
-            if ch == "\\":
-                escaped += "/"
-            elif ch == " ":
-                escaped += "\\ "
-            elif ch == "'":
-                escaped += "\\'"
-            else:
-                escaped += ch
-        return escaped
+        graph = video_graph(size) + ";\n[video]tpad=stop=-1:stop_mode=clone[segment]"
+    partial = f"{target}.{threading.get_ident()}.partial"
+    args = f'-y -f pam_pipe -framerate {settings["fps"]} -i pipe:0 -filter_complex "{" ".join(graph.splitlines())}" -map "[segment]" -frames:v {frames} {video_codecs(settings, threads)} -f mp4 "{partial}"'
+
+    def feed(pipe):
+        write_frame(pipe, frame)
+
+    returncode, _ = run_ffmpeg(ffmpeg, args, f"segment {os.path.basename(target)}", feed)
+    if returncode != 0:
+        if os.path.exists(partial):
+            os.remove(partial)
+        return f"ffmpeg (segment) exited with code {returncode}"
+    os.replace(partial, target)
+    return None
 
-    image_dir = os.path.join(TMP_DIR, "images")
-    if os.path.exists(image_dir):
-        shutil.rmtree(image_dir)
-    os.mkdir(image_dir)
 
-    logger.info("Converting images:")
-    concat_script = ""
+def generate_segments(ffmpeg: str, images: list[str], duration: float, audio_args: str, output: str, jobs: int, segment_cache: ConversionCache, size: QSize, settings: dict, progress: Callable[[dict], None] = None, compose: bool = False):
+    fps = settings["fps"]
+    # Round the slide boundaries instead of the slide durations, so the rounding errors do not add up
+    boundaries = [round(i * duration * fps) for i in range(len(images) + 1)]
+    params = f"{settings['preset']}|{settings['crf']}|{settings['tune']}|{fps}|{'composed' if compose else 'filter'}"
+    segments: list[str] = []
+    encodes: dict[str, tuple[str, int]] = {}
     for i, image in enumerate(images):
-        tmp_image = os.path.join(image_dir, f"image{i:03d}.jpg")
-        logger.info(f"  {image} -> {tmp_image}")
-        reader = QImageReader(image)
-        if not reader.canRead():
-            return reader.errorString()
-        QPixmap.fromImageReader(reader).save(tmp_image)
-        concat_script += f"file {ffmpeg_escape(tmp_image)}\n"
-        concat_script += f"duration {format_decimals(duration, 1)}\n"
-
-    # Append a black image at the end because of some bug
+        frames = max(1, boundaries[i + 1] - boundaries[i])
+        try:
+            segment = segment_cache.path(image, size, "mp4", f"{params}|{frames}")
+        except OSError as x:
+            return f"{image}: {x.strerror}"
+        segments.append(segment)
+        if segment not in encodes and not segment_cache.lookup(segment):
+            encodes[segment] = (image, frames)
+
+    workers = max(1, min(jobs, len(encodes)))
+    # Few changed slides get all the cores, many changed slides are encoded in parallel instead
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    logger.info(f"Encoding {len(encodes)}/{len(images)} segments ({workers} jobs, {threads} threads each):")
+    encode_start = time.perf_counter()
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(encode_segment, ffmpeg, image, segment, size, settings, frames, threads, compose): image
+            for segment, (image, frames) in encodes.items()
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            image = futures[future]
+            error = future.result()
+            if error is None:
+                logger.info(f"  {image}")
+            else:
+                logger.error(f"  {image}: {error}")
+                failed.append(f"{image}: {error}")
+            if progress is not None:
+                elapsed = time.perf_counter() - encode_start
+                progress({
+                    "stage": "segments",
+                    "frame": 0,
+                    "fps": 0.0,
+                    "speed": 0.0,
+                    "bitrate": "N/A",
+                    "out_time": 0.0,
+                    "percent": done / len(futures) * 100,
+                    "eta": elapsed * (len(futures) - done) / done,
+                    "elapsed": elapsed,
+                    "done": done == len(futures),
+                })
+    logger.info(f"[timing] encode segments: {time.perf_counter() - encode_start:.2f}s")
+    logger.info(f"Segment cache: {segment_cache.hits} hits, {segment_cache.misses} misses")
+    if failed:
+        return f"Failed to encode {len(failed)} segment(s):\n" + "\n".join(failed)
+
+    work_dir = tempfile.mkdtemp(prefix="export-", dir=TMP_DIR or None)
+    concat_file = os.path.join(work_dir, "segments.txt")
+    with tracer.span("write concat script"), open(concat_file, "w") as f:
+        for segment in segments:
+            f.write(f"file {ffmpeg_escape(segment)}\n")
+    # The segments are encoded with the same settings, so they are joined without re-encoding
+    args = f'-y -f concat -safe 0 -i "{concat_file}" {audio_args} -c:v copy "{output}"'
+    returncode, _ = run_ffmpeg(ffmpeg, args, "concat", None, progress, len(images) * duration)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    # Evict only after ffmpeg is done with the segments
+    cache_size = segment_cache.evict()
+    logger.info(f"Segment cache: {segment_cache.evictions} evictions, {cache_size / 1024 / 1024:.1f}/{segment_cache.max_bytes / 1024 / 1024:.0f} MB used")
+    if returncode != 0:
+        if os.path.exists(output):
+            os.remove(output)
+        return f"ffmpeg (concat) exited with code {returncode}"
+    return None
+
+
+def audio_fades(video_duration: float, fade_in: bool, fade_out: bool):
+    total_duration = int(video_duration)
+    fade_in_duration = 1 if fade_in else 0
+    fade_out_duration = 2 if fade_out else 0
+    fade_out_start = total_duration - fade_out_duration
+    if fade_out_start < 1:
+        fade_out_start = total_duration
+        fade_out_duration = 0
+    return fade_in_duration, fade_out_start, fade_out_duration
+
+
+def prepare_audio(ffmpeg: str, music: str, video_duration: float, fade_in: bool, fade_out: bool, cache: ConversionCache, progress: Callable[[dict], None] = None):
+    # Decodes the music once into a trimmed and faded AAC track, exports copy it and the preview plays it
+    fade_in_duration, fade_out_start, fade_out_duration = audio_fades(video_duration, fade_in, fade_out)
+    try:
+        target = cache.path(music, None, "m4a", f"{video_duration:g}|{fade_in_duration}|{fade_out_start}|{fade_out_duration}|aac 192k")
+    except OSError as x:
+        return None, f"{music}: {x.strerror}"
+    if cache.lookup(target):
+        logger.info(f"Audio cache hit: {music} -> {target}")
+        return target, None
+
+    # Concurrent exports of the same music write to their own file, the last one wins
+    partial = f"{target}.{threading.get_ident()}.partial.m4a"
+    audio_filter = f"afade=in:st=0:d={fade_in_duration},afade=out:st={fade_out_start}:d={fade_out_duration}"
+    args = f'-y -i "{music}" -vn -t {video_duration:g} -af "{audio_filter}" -c:a aac -b:a 192k "{partial}"'
+    returncode, error = run_ffmpeg(ffmpeg, args, "audio", None, progress, video_duration)
+    if returncode != 0 or error is not None:
+        if os.path.exists(partial):
+            os.remove(partial)
+        return None, error or f"ffmpeg (audio) exited with code {returncode}"
+    os.replace(partial, target)
+    cache.evict()
+    return target, None
+
+
+def generate_video(images: list[str], duration: float, music: str, fade_in: bool, fade_out: bool, output: str, jobs: int = 0, stream: bool = True, cache: ConversionCache = None, profile: str = DEFAULT_PROFILE, progress: Callable[[dict], None] = None, segment_cache: ConversionCache = None, compose: bool = True, audio_cache: ConversionCache = None, extra_outputs: list[tuple[str, str]] = None):
+    # The extra outputs are (output, profile) pairs, they are encoded from the same decoded slides
+    targets = [(output, profile)] + list(extra_outputs or [])
+    for _, target_profile in targets:
+        if target_profile not in EXPORT_PROFILES:
+            return f"Unknown export profile: {target_profile}"
+    if len(targets) > 1 and segment_cache is None:
+        # The outputs differ in size and aspect ratio, so ffmpeg splits the slides and blurs and scales them per output
+        compose = False
+    target_settings = []
+    for _, target_profile in targets:
+        settings = EXPORT_PROFILES[target_profile]
+        if compose:
+            # Every slide is a single still frame that is repeated until the next one
+            settings = dict(settings, tune=settings["tune"] or "stillimage")
+        target_settings.append(settings)
+    # The slides are decoded big enough for every output
+    size = QSize(max(settings["size"].width() for settings in target_settings), max(settings["size"].height() for settings in target_settings))
+    video_duration = duration * len(images)
+    fade_in_duration, fade_out_start, fade_out_duration = audio_fades(video_duration, fade_in, fade_out)
+
+    ffmpeg, error = find_ffmpeg()
+    if error is not None:
+        return error
+
+    audio = ""
+    if music and audio_cache is not None:
+        audio, error = prepare_audio(ffmpeg, music, video_duration, fade_in, fade_out, audio_cache, progress)
+        if error is not None:
+            return error
+
+    outputs = [target for target, _ in targets]
+    outputs_noaudio = []
+    for target in outputs:
+        if music:
+            stem, _ = os.path.splitext(os.path.basename(target))
+            outputs_noaudio.append(os.path.join(os.path.dirname(target), f"{stem}.noaudio.mp4"))
+        else:
+            outputs_noaudio.append(target)
+
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+
+    audio_filter = f"afade=in:st=0:d={fade_in_duration},afade=out:st={fade_out_start}:d={fade_out_duration}"
+    if segment_cache is not None:
+        audio_args = "-map 0:v:0"
+        if audio:
+            audio_args = f'-i "{audio}" -map 0:v:0 -map 1:a:0 -c:a copy -shortest'
+        elif music:
+            audio_args = f'-i "{music}" -map 0:v:0 -map 1:a:0 -af "{audio_filter}" -c:a aac -b:a 192k -shortest'
+        # NOTE: the segments are encoded per output size, so every output is rendered separately
+        for target, settings in zip(outputs, target_settings):
+            error = generate_segments(ffmpeg, images, duration, audio_args, target, jobs, segment_cache, settings["size"], settings, progress, compose)
+            if error is not None:
+                return error
+        return None
+
     black_jpg = os.path.join(basedir, "data", "black.jpg")
-    concat_script += f"file {ffmpeg_escape(black_jpg)}\n"
-
-    concat_file = os.path.join(TMP_DIR, "files.txt")
-    with open(concat_file, "w") as f:
-        f.write(concat_script)
-
-    filter_file = os.path.join(TMP_DIR, "blur-resize.filter")
-    with open(filter_file, "w") as f:
-        f.write(VIDEO_FILTER)
-
-    args1 = f'"{ffmpeg}" -y -f concat -safe 0 -i "{concat_file}" -filter_complex_script "{filter_file}" -c:v libx264 -r 30 -pix_fmt yuv420p "{output_noaudio}"'
-    logger.info(f"[ffmpeg] command 1: {args1}")
-    result1 = subprocess.run(args1, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
-    output1 = result1.stdout.decode(errors="ignore").strip()
-    logger.info(f"[ffmpeg] exit code: {result1.returncode}, output:\n{output1}\n==========")
-    if result1.returncode != 0:
-        if os.path.exists(output_noaudio):
-            os.remove(output_noaudio)
-        return f"ffmpeg (1) exited with code {result1.returncode}"
-
-    shutil.rmtree(image_dir)
-
-    if music:
-        args2 = f'"{ffmpeg}" -y -i "{output_noaudio}" -i "{music}" -c:v copy -filter_complex "afade=in:st=0:d={fade_in_duration},afade=out:st={fade_out_start}:d={fade_out_duration}" -map 0:v:0 -map 1:a:0 -c:a aac -b:a 192k -shortest "{output}"'
-        logger.info(f"[ffmpeg] command 2: {args2}")
-        result2 = subprocess.run(args2, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
-        output2 = result2.stdout.decode(errors="ignore").strip()
-        logger.info(f"[ffmpeg] exit code: {result2.returncode}, output:\n{output2}\n==========")
-
-        if result2.returncode != 0:
-            if os.path.exists(output):
-                os.remove(output)
-            return f"ffmpeg (2) exited with code {result2.returncode}"
-
-        if os.path.exists(output_noaudio):
-            os.remove(output_noaudio)
+    # Every export gets its own working directory, exports can run concurrently (see render_main)
+    work_dir = tempfile.mkdtemp(prefix="export-", dir=TMP_DIR or None)
+    image_dir = os.path.join(work_dir, "images")
+    if stream:
+        def feed(pipe):
+            # Append a black image at the end, same as the concat script
+            frame_images = images + [black_jpg]
+            logger.info(f"Streaming images ({jobs} jobs):")
+            stream_start = time.perf_counter()
+            pool = ThreadPoolExecutor(max_workers=jobs)
+            try:
+                for image, (frame, error) in zip(frame_images, ordered_map(pool, lambda image: read_frame(image, size, compose), frame_images, jobs * 2)):
+                    if error is not None:
+                        logger.error(f"  {image}: {error}")
+                        return f"{image}: {error}"
+                    logger.info(f"  {image} ({frame.width()}x{frame.height()})")
+                    write_frame(pipe, frame)
+            finally:
+                pool.shutdown(cancel_futures=True)
+            # NOTE: this includes the time spent waiting for ffmpeg to read the frames
+            logger.info(f"[timing] stream images: {time.perf_counter() - stream_start:.2f}s")
+            return None
+
+        rate = 1 / Fraction(duration).limit_denominator(1000)
+        video_input = f"-f pam_pipe -framerate {rate.numerator}/{rate.denominator} -i pipe:0"
+    else:
+        feed = None
+        if cache is None:
+            os.mkdir(image_dir)
+            tmp_images = [os.path.join(image_dir, f"image{i:03d}.jpg") for i in range(len(images))]
+            converts = list(range(len(images)))
+        else:
+            tmp_images = []
+            converts = []
+            for i, image in enumerate(images):
+                try:
+                    tmp_image = cache.path(image, size, params="composed" if compose else "")
+                except OSError as x:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+                    return f"{image}: {x.strerror}"
+                tmp_images.append(tmp_image)
+                if not cache.lookup(tmp_image):
+                    converts.append(i)
+
+        logger.info(f"Converting {len(converts)}/{len(images)} images ({jobs} jobs):")
+        convert_start = time.perf_counter()
+        errors: list[str] = [None] * len(images)
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            # NOTE: map() yields the results in the order of the input
+            results = pool.map(convert_image, [images[i] for i in converts], [tmp_images[i] for i in converts], [size] * len(converts), [compose] * len(converts))
+            for i, error in zip(converts, results):
+                errors[i] = error
+        logger.info(f"[timing] convert images: {time.perf_counter() - convert_start:.2f}s")
+
+        concat_script = ""
+        failed = []
+        for image, tmp_image, error in zip(images, tmp_images, errors):
+            if error is None:
+                logger.info(f"  {image} -> {tmp_image}")
+            else:
+                logger.error(f"  {image}: {error}")
+                failed.append(f"{image}: {error}")
+            concat_script += f"file {ffmpeg_escape(tmp_image)}\n"
+            concat_script += f"duration {format_decimals(duration, 1)}\n"
+        if cache is not None:
+            logger.info(f"Conversion cache: {cache.hits} hits, {cache.misses} misses")
+        if failed:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            return f"Failed to convert {len(failed)} image(s):\n" + "\n".join(failed)
+
+        # Append a black image at the end because of some bug
+        concat_script += f"file {ffmpeg_escape(black_jpg)}\n"
+
+        concat_file = os.path.join(work_dir, "files.txt")
+        with tracer.span("write concat script"), open(concat_file, "w") as f:
+            f.write(concat_script)
+
+        video_input = f'-f concat -safe 0 -i "{concat_file}"'
+
+    def encode_args(targets: list[str], with_music: bool):
+        graphs = []
+        inputs = video_input
+        if len(targets) > 1:
+            # Every output gets its own copy of the decoded slides
+            graphs.append(f"[0:v]split={len(targets)}" + "".join(f"[slides{i}]" for i in range(len(targets))))
+        target_args = []
+        for i, (target, settings) in enumerate(zip(targets, target_settings)):
+            if compose:
+                # Composed slides are encoded as they are, ffmpeg only repeats the frames to the output frame rate
+                maps = "-map 0:v:0"
+            elif len(targets) == 1:
+                graphs.append(video_graph(settings["size"]))
+                maps = '-map "[video]"'
+            else:
+                graphs.append(video_graph(settings["size"], f"slides{i}", f"out{i}"))
+                maps = f'-map "[out{i}video]"'
+            codecs = video_codecs(settings)
+            if with_music and audio:
+                # The prepared track is already trimmed, faded and encoded
+                maps += " -map 1:a:0"
+                codecs += " -c:a copy -shortest"
+            elif with_music:
+                maps += ' -map "[audio]"' if len(targets) == 1 else f' -map "[audio{i}]"'
+                codecs += " -c:a aac -b:a 192k -shortest"
+            target_args.append(f'{maps} {codecs} "{target}"')
+        if with_music and audio:
+            inputs += f' -i "{audio}"'
+        elif with_music:
+            # Mux the music in the same pass, this avoids writing and reading back an intermediate file
+            graphs.append(AUDIO_FILTER.format(fade_in_duration, fade_out_start, fade_out_duration))
+            inputs += f' -i "{music}"'
+            if len(targets) > 1:
+                graphs.append(f"[audio]asplit={len(targets)}" + "".join(f"[audio{i}]" for i in range(len(targets))))
+        graph = ";\n".join(graphs)
+        if not graph:
+            filter_args = ""
+        elif stream:
+            filter_args = f'-filter_complex "{" ".join(graph.splitlines())}"'
+        else:
+            filter_file = os.path.join(work_dir, "blur-resize.filter")
+            with open(filter_file, "w") as f:
+                f.write(graph)
+            filter_args = f'-filter_complex_script "{filter_file}"'
+        return " ".join(arg for arg in ["-y", inputs, filter_args] + target_args if arg)
+
+    def cleanup():
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if cache is not None:
+            # Evict only after ffmpeg is done with the files referenced by the concat script
+            cache_size = cache.evict()
+            logger.info(f"Conversion cache: {cache.evictions} evictions, {cache_size / 1024 / 1024:.1f}/{cache.max_bytes / 1024 / 1024:.0f} MB used")
+
+    def remove_outputs():
+        for path in outputs + outputs_noaudio:
+            if os.path.exists(path):
+                os.remove(path)
+
+    returncode1, error1 = run_ffmpeg(ffmpeg, encode_args(outputs, bool(music)), "1", feed, progress, video_duration)
+    if music and returncode1 != 0 and error1 is None:
+        # Fall back to encoding the video first and muxing the music in a second pass
+        logger.warning("Single-pass export failed, falling back to two passes")
+        remove_outputs()
+        returncode1, error1 = run_ffmpeg(ffmpeg, encode_args(outputs_noaudio, False), "1 (fallback)", feed, progress, video_duration)
+        if returncode1 == 0 and error1 is None:
+            cleanup()
+            for target, output_noaudio in zip(outputs, outputs_noaudio):
+                if audio:
+                    args2 = f'-y -i "{output_noaudio}" -i "{audio}" -c copy -map 0:v:0 -map 1:a:0 -shortest "{target}"'
+                else:
+                    args2 = f'-y -i "{output_noaudio}" -i "{music}" -c:v copy -af "{audio_filter}" -map 0:v:0 -map 1:a:0 -c:a aac -b:a 192k -shortest "{target}"'
+                returncode2, _ = run_ffmpeg(ffmpeg, args2, "2 (fallback)", None, progress, video_duration)
+                if os.path.exists(output_noaudio):
+                    os.remove(output_noaudio)
+                if returncode2 != 0:
+                    remove_outputs()
+                    return f"ffmpeg (2) exited with code {returncode2}"
+            return None
+
+    cleanup()
+    if returncode1 != 0 or error1 is not None:
+        remove_outputs()
+        if error1 is not None:
+            return error1
+        return f"ffmpeg (1) exited with code {returncode1}"
 
     return None
 
 
+class ImageCache:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.entries: collections.OrderedDict = collections.OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def cost(image: QPixmap | QImage):
+        return image.width() * image.height() * image.depth() // 8
+
+    def get(self, key):
+        image = self.entries.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        # Mark as most recently used
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return image
+
+    def put(self, key, image: QPixmap | QImage):
+        self.remove(key)
+        self.entries[key] = image
+        self.total_bytes += self.cost(image)
+        # Evict the least recently used entries, but always keep the newest one
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= self.cost(evicted)
+            self.evictions += 1
+
+    def remove(self, key):
+        image = self.entries.pop(key, None)
+        if image is not None:
+            self.total_bytes -= self.cost(image)
+
+    def retain(self, predicate: Callable[[object], bool]):
+        for key in [key for key in self.entries if not predicate(key)]:
+            self.remove(key)
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def stats(self):
+        return f"{len(self.entries)} entries, {self.total_bytes / 1024 / 1024:.1f}/{self.max_bytes / 1024 / 1024:.0f} MB, {self.hits} hits, {self.misses} misses, {self.evictions} evictions"
+
+
+class ImportThread(QThread):
+    found = Signal(int, list)
+    done = Signal(int)
+
+    def __init__(self, parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.paths: list[str] = []
+        self.sort = "name"
+        self.count = 0
+        # Signals of an interrupted import can still be queued, they are ignored by their generation
+        self.generation = 0
+
+    def run(self):
+        # The images are sent in batches of (sort key, path), see MainWindow.onImportFound
+        generation = self.generation
+        mimedb = QMimeDatabase()
+        self.count = 0
+        batch = []
+        last_batch = time.perf_counter()
+        try:
+            for path in scan_images(self.paths, mimedb, self.isInterruptionRequested):
+                if self.sort == "time":
+                    key = (capture_time(path), self.count)
+                else:
+                    key = (self.count,)
+                batch.append((key, path))
+                self.count += 1
+                now = time.perf_counter()
+                if len(batch) >= 500 or now - last_batch > 0.1:
+                    self.found.emit(generation, batch)
+                    batch = []
+                    last_batch = now
+            if batch:
+                self.found.emit(generation, batch)
+        finally:
+            # NOTE: the window stays in the importing state until this arrives
+            self.done.emit(generation)
+
+
 class GenerateVideoThread(QThread):
+    progress = Signal(object)
+
     def __init__(self, parent: QObject = None) -> None:
         super().__init__(parent)
         self.images: list[str] = []
@@ -190,17 +1188,445 @@ class GenerateVideoThread(QThread):
         self.fade_in = True
         self.fade_out = True
         self.output = ""
+        self.jobs = 0
+        self.stream = True
+        self.cache: ConversionCache = None
+        self.profile = DEFAULT_PROFILE
+        self.segment_cache: ConversionCache = None
+        self.compose = True
+        self.audio_cache: ConversionCache = None
+        self.extra_outputs: list[tuple[str, str]] = []
+        self.error: str = None
+        self.seconds = 0.0
+
+    @property
+    def profiles(self):
+        return ", ".join([self.profile] + [profile for _, profile in self.extra_outputs])
+
+    def run(self):
+        start = time.perf_counter()
+        with tracer.span("export", profile=self.profiles):
+            self.error = generate_video(
+                self.images,
+                self.duration,
+                self.music,
+                self.fade_in,
+                self.fade_out,
+                self.output,
+                self.jobs,
+                self.stream,
+                self.cache,
+                self.profile,
+                self.progress.emit,
+                self.segment_cache,
+                self.compose,
+                self.audio_cache,
+                self.extra_outputs,
+            )
+        self.seconds = time.perf_counter() - start
+        video_duration = self.duration * len(self.images)
+        logger.info(f"[timing] export ({self.profiles}): {self.seconds:.2f}s, {video_duration / self.seconds:.2f}x realtime")
+
+
+class PrepareAudioThread(QThread):
+    # generation, music, prepared audio (None on error), error
+    prepared = Signal(int, str, object, object)
+
+    def __init__(self, generation: int, music: str, duration: float, fade_in: bool, fade_out: bool, cache: ConversionCache, parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.generation = generation
+        self.music = music
+        self.duration = duration
+        self.fade_in = fade_in
+        self.fade_out = fade_out
+        self.cache = cache
+
+    def run(self):
+        audio = None
+        ffmpeg, error = find_ffmpeg()
+        if error is None:
+            audio, error = prepare_audio(ffmpeg, self.music, self.duration, self.fade_in, self.fade_out, self.cache)
+        self.prepared.emit(self.generation, self.music, audio, error)
+
+
+class RenderJob:
+    def __init__(self, loader: "RenderLoader", key, path: str, size: QSize) -> None:
+        self.loader = loader
+        self.key = key
+        self.path = path
+        self.size = size
+        self.priority = 0
+        self.cancelled = False
+        self.image: QImage = None
         self.error: str = None
 
     def run(self):
-        self.error = generate_video(
-            self.images,
-            self.duration,
-            self.music,
-            self.fade_in,
-            self.fade_out,
-            self.output,
-        )
+        # NOTE: runs on a QThreadPool thread
+        if self.cancelled:
+            return
+        with tracer.span("render job", path=self.path):
+            image, self.error = read_scaled(self.path, self.size)
+            if self.error is None:
+                self.image = compose_image(image, self.size)
+        self.loader.done.emit(self)
+
+
+class RenderLoader(QObject):
+    loaded = Signal(object, QImage)
+    failed = Signal(object, str)
+    done = Signal(object)
+
+    def __init__(self, parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.jobs: dict[object, RenderJob] = {}
+        self.done.connect(self.onDone)
+
+    def request(self, key, path: str, size: QSize, priority: int = 0):
+        self.cancel(key)
+        job = RenderJob(self, key, path, size)
+        job.priority = priority
+        self.jobs[key] = job
+        self.pool.start(job.run, priority)
+
+    def prioritize(self, key):
+        # Queue a copy with a higher priority, the original turns into a no-op
+        job = self.jobs.get(key)
+        if job is not None and job.priority == 0 and job.image is None:
+            self.request(key, job.path, job.size, 1)
+
+    def cancel(self, key):
+        job = self.jobs.pop(key, None)
+        if job is not None:
+            job.cancelled = True
+
+    def cancel_all(self):
+        for job in self.jobs.values():
+            job.cancelled = True
+        self.jobs.clear()
+        self.pool.clear()
+
+    def onDone(self, job: RenderJob):
+        if job.cancelled or self.jobs.get(job.key) is not job:
+            return
+        del self.jobs[job.key]
+        if job.error is None:
+            self.loaded.emit(job.key, job.image)
+        else:
+            self.failed.emit(job.key, job.error)
+
+
+class PreviewPrefetcher(QObject):
+    def __init__(self, depth: int, parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.depth = depth
+        self.loader = RenderLoader(self)
+        self.loader.pool.setMaxThreadCount(max(1, min(depth, QThread.idealThreadCount())))
+        # NOTE: failures are ignored, the slide is rendered (and reported) synchronously instead
+        self.loader.loaded.connect(self.onLoaded)
+        self.ready: dict[tuple, QImage] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def schedule(self, paths: list[str], size: QSize):
+        keys = [(path, size.width(), size.height()) for path in paths[:self.depth]]
+        wanted = set(keys)
+        for key in list(self.loader.jobs):
+            if key not in wanted:
+                self.loader.cancel(key)
+        for key in list(self.ready):
+            if key not in wanted:
+                del self.ready[key]
+        # The closest slide gets the highest priority
+        for i, key in enumerate(keys):
+            if key not in self.ready and key not in self.loader.jobs:
+                self.loader.request(key, key[0], size, len(keys) - i)
+
+    def take(self, path: str, size: QSize):
+        image = self.ready.pop((path, size.width(), size.height()), None)
+        if image is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return image
+
+    def clear(self):
+        self.loader.cancel_all()
+        self.ready.clear()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return f"depth {self.depth}, {len(self.ready)} ready, {len(self.loader.jobs)} pending, {self.hits} on time, {self.misses} missed deadlines"
+
+    def onLoaded(self, key: tuple, image: QImage):
+        self.ready[key] = image
+
+
+class HashIndex(QObject):
+    # Perceptual hashes of the slides, stored by file fingerprint so unchanged images are decoded only once
+    hashed = Signal(int, str, str, object, bool)
+    grouped = Signal(int, list)
+    finished = Signal()
+
+    def __init__(self, path: str, max_entries: int = 100000, parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.path = path
+        self.max_entries = max_entries
+        # NOTE: loaded on first use, written only on the GUI thread (the workers just call get)
+        self.entries: dict[str, int] = None
+        self.dirty = False
+        self.current: dict[str, int] = {}
+        self.pending: set[str] = set()
+        self.generation = 0
+        self.pool = QThreadPool(self)
+        # Leave some threads for the thumbnails and the preview
+        self.pool.setMaxThreadCount(max(1, QThread.idealThreadCount() // 2))
+        self.hashed.connect(self.onHashed)
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        self.entries = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                index = json.load(f)
+            # NOTE: the hashes of older versions have no average color
+            if index.get("version") != HASH_INDEX_VERSION:
+                logger.info(f"Ignoring the hash index {self.path} of an older version")
+                return
+            self.entries = {str(key): int(hash) for key, hash in index["entries"].items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, AttributeError, KeyError) as x:
+            logger.warning(f"Ignoring the hash index {self.path}: {x}")
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        # Forget the oldest images
+        for key in list(itertools.islice(self.entries, max(0, len(self.entries) - self.max_entries))):
+            del self.entries[key]
+        partial = f"{self.path}.partial"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(partial, "w", encoding="utf-8") as f:
+                json.dump({"version": HASH_INDEX_VERSION, "entries": self.entries}, f)
+            os.replace(partial, self.path)
+        except OSError as x:
+            logger.warning(f"Failed to save the hash index {self.path}: {x}")
+
+    def request(self, paths: list[str]):
+        # Hashes the images in the background, finished is emitted when they are done
+        if self.entries is None:
+            self.load()
+        for path in paths:
+            if path not in self.pending:
+                self.pending.add(path)
+                self.pool.start(functools.partial(self.hash_file, self.generation, path))
+        if not self.pending:
+            self.finished.emit()
+
+    def hash_file(self, generation: int, path: str):
+        # NOTE: runs on a QThreadPool thread
+        if generation != self.generation:
+            return
+        fingerprint = file_fingerprint(path)
+        if fingerprint is None:
+            self.hashed.emit(generation, path, "", None, False)
+            return
+        key = f"{path}|{fingerprint[0]}|{fingerprint[1]}"
+        hash = self.entries.get(key)
+        if hash is not None:
+            self.hashed.emit(generation, path, key, hash, True)
+            return
+        with tracer.span("hash", path=path):
+            image, error = read_scaled(path, HASH_SIZE)
+            if error is None:
+                hash = perceptual_hash(image)
+        self.hashed.emit(generation, path, key, hash, False)
+
+    def onHashed(self, generation: int, path: str, key: str, hash: int, cached: bool):
+        if generation != self.generation:
+            return
+        self.pending.discard(path)
+        if hash is None:
+            self.current.pop(path, None)
+        else:
+            self.current[path] = hash
+            if cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self.entries[key] = hash
+                self.dirty = True
+        if not self.pending:
+            self.save()
+            self.finished.emit()
+
+    def group(self, paths: list[str], distance: int):
+        # Finds the (near) duplicates in the background, grouped is emitted with the groups of rows
+        hashes = [self.current.get(path) for path in paths]
+        self.pool.start(functools.partial(self.group_hashes, self.generation, hashes, distance))
+
+    def group_hashes(self, generation: int, hashes: list[int], distance: int):
+        # NOTE: runs on a QThreadPool thread
+        with tracer.span("duplicate groups", count=len(hashes)):
+            groups = duplicate_groups(hashes, distance)
+        self.grouped.emit(generation, groups)
+
+    def cancel(self):
+        self.generation += 1
+        self.pool.clear()
+        self.pending.clear()
+        self.save()
+
+    def stats(self):
+        count = 0 if self.entries is None else len(self.entries)
+        return f"{count} entries, {len(self.pending)} pending, {self.hits} from the index, {self.misses} decoded"
+
+
+class SlideModel(QAbstractListModel):
+    # Emitted when a row is painted without a thumbnail, see MainWindow.request_thumbnails
+    icon_needed = Signal()
+
+    def __init__(self, icon_size: QSize, icon_cache_bytes: int, parent: QObject = None) -> None:
+        super().__init__(parent)
+        # One record per slide: the path and a key that stays the same when the slide is moved
+        self.paths: list[str] = []
+        self.keys: list[int] = []
+        self.next_key = 0
+        # Only a few slides have these, so they are kept by key
+        self.fingerprints: dict[int, list[int]] = {}
+        self.tooltips: dict[int, str] = {}
+        # The thumbnails of the rows that were visible recently
+        self.icons = ImageCache(icon_cache_bytes)
+        self.placeholder = QPixmap(icon_size)
+        self.placeholder.fill(Qt.GlobalColor.lightGray)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.paths)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return os.path.basename(self.paths[row])
+        if role == Qt.ItemDataRole.DecorationRole:
+            icon = self.icons.get(self.keys[row])
+            if icon is None:
+                self.icon_needed.emit()
+                return self.placeholder
+            return icon
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.tooltips.get(self.keys[row])
+        if role == Qt.ItemDataRole.UserRole:
+            return self.paths[row]
+        return None
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            # NOTE: slides are dropped between the rows, not on them
+            return Qt.ItemFlag.ItemIsDropEnabled
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsDragEnabled
+
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    def moveRows(self, sourceParent: QModelIndex, sourceRow: int, count: int, destinationParent: QModelIndex, destinationChild: int) -> bool:
+        # NOTE: QListView calls this for internal drag and drop
+        if sourceParent.isValid() or destinationParent.isValid():
+            return False
+        if not self.beginMoveRows(sourceParent, sourceRow, sourceRow + count - 1, destinationParent, destinationChild):
+            return False
+        if destinationChild > sourceRow:
+            destinationChild -= count
+        for records in (self.paths, self.keys):
+            moved = records[sourceRow:sourceRow + count]
+            del records[sourceRow:sourceRow + count]
+            records[destinationChild:destinationChild] = moved
+        self.endMoveRows()
+        return True
+
+    def move(self, source: int, destination: int):
+        # NOTE: QListView lays out every row again for rowsMoved and dataChanged (~0.1s for 10k slides),
+        # so the records are changed in place and the caller repaints the view
+        for records in (self.paths, self.keys):
+            records.insert(destination, records.pop(source))
+
+    def insert(self, row: int, paths: list[str], fingerprints: list[list[int]] = None):
+        keys = list(range(self.next_key, self.next_key + len(paths)))
+        if not keys:
+            return keys
+        self.next_key += len(keys)
+        self.beginInsertRows(QModelIndex(), row, row + len(keys) - 1)
+        self.paths[row:row] = paths
+        self.keys[row:row] = keys
+        if fingerprints is not None:
+            for key, fingerprint in zip(keys, fingerprints):
+                if fingerprint is not None:
+                    self.fingerprints[key] = fingerprint
+        self.endInsertRows()
+        return keys
+
+    def remove(self, row: int, count: int = 1):
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        for key in self.keys[row:row + count]:
+            self.fingerprints.pop(key, None)
+            self.tooltips.pop(key, None)
+            self.icons.remove(key)
+        del self.paths[row:row + count]
+        del self.keys[row:row + count]
+        self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.paths.clear()
+        self.keys.clear()
+        self.fingerprints.clear()
+        self.tooltips.clear()
+        self.icons.clear()
+        self.endResetModel()
+
+    def row(self, key: int):
+        try:
+            return self.keys.index(key)
+        except ValueError:
+            return -1
+
+    def set_icon(self, key: int, icon: QPixmap):
+        # NOTE: no dataChanged, see move
+        if self.row(key) != -1:
+            self.icons.put(key, icon)
+
+
+class SlideView(QListView):
+    # The parts of the QListWidget interface that MainWindow uses
+    def count(self):
+        return self.model().rowCount()
+
+    def currentRow(self):
+        return self.currentIndex().row()
+
+    def setCurrentRow(self, row: int):
+        if row == -1:
+            self.selectionModel().clear()
+        else:
+            self.setCurrentIndex(self.model().index(row, 0))
+
+    def visibleRows(self):
+        viewport = self.viewport().rect()
+        first = self.indexAt(viewport.topLeft()).row()
+        if first == -1:
+            return range(0)
+        last = self.indexAt(viewport.bottomLeft()).row()
+        if last == -1:
+            last = self.count() - 1
+        return range(first, last + 1)
 
 
 class AspectRatioWidget(QWidget):
@@ -243,24 +1669,31 @@ class DoubleSpinBox(QDoubleSpinBox):
 
 
 # Reference: https://stackoverflow.com/a/66664679/1806760
-class QLogger(QObject):
-    message = Signal(str)
-
-
 class QLoggerHandler(logging.Handler):
-    message = Signal(str)
-
-    def __init__(self, logger: QLogger = None, level = logging.DEBUG) -> None:
+    def __init__(self, capacity: int, level = logging.DEBUG) -> None:
         super().__init__(level)
-        self.logger = logger
+        # Messages are kept in a ring buffer and shown in batches, see LogDialog.onFlush
+        self.messages = collections.deque(maxlen=capacity)
+        self.dropped = 0
 
     def emit(self, record) -> None:
+        # NOTE: logging.Handler.handle holds self.lock while calling emit
         message = self.format(record)
-        self.logger.message.emit(message)
+        if len(self.messages) == self.messages.maxlen:
+            self.dropped += 1
+        self.messages.append(message)
+
+    def take(self):
+        with self.lock:
+            messages = list(self.messages)
+            self.messages.clear()
+            dropped = self.dropped
+            self.dropped = 0
+        return messages, dropped
 
 
 class LogDialog(QDialog):
-    def __init__(self, parent: QWidget = None) -> None:
+    def __init__(self, parent: QWidget, log_handler: QLoggerHandler) -> None:
         super().__init__(parent, Qt.WindowType.Dialog)
 
         self.setWindowTitle(self.tr("Log"))
@@ -271,23 +1704,93 @@ class LogDialog(QDialog):
 
         self.edit_log = QPlainTextEdit()
         self.edit_log.setReadOnly(True)
+        # Old lines are removed from the top, so the document does not grow without bound
+        self.edit_log.setMaximumBlockCount(log_handler.messages.maxlen)
+        # Follow the new messages, unless the log is scrolled up
+        self.follow_log = True
+        scroll_bar = self.edit_log.verticalScrollBar()
+        def onScroll(value):
+            self.follow_log = value == scroll_bar.maximum()
+        scroll_bar.valueChanged.connect(onScroll)
+        def onScrollRange(minimum, maximum):
+            if self.follow_log:
+                scroll_bar.setValue(maximum)
+        scroll_bar.rangeChanged.connect(onScrollRange)
         monospace = QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
         self.edit_log.setFont(monospace)
 
+        self.label_stats = QLabel()
+        self.label_stats.setFont(monospace)
+        self.label_stats.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.label_stats.setContentsMargins(4, 0, 4, 4)
+        self.stats: list[tuple[str, Callable[[], str]]] = []
+        self.label_trace = QLabel()
+        self.label_trace.setFont(monospace)
+        self.label_trace.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.label_trace.setContentsMargins(4, 0, 4, 4)
+        self.label_trace.setVisible(False)
+        self.timer_stats = QTimer(self)
+        self.timer_stats.timeout.connect(self.update_stats)
+
+        self.progress_export = QProgressBar()
+        self.progress_export.setRange(0, 1000)
+        self.progress_export.setVisible(False)
+
         layout = QVBoxLayout()
         layout.setSpacing(4)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(self.edit_log)
+        layout.addWidget(self.label_stats)
+        layout.addWidget(self.label_trace)
+        layout.addWidget(self.progress_export)
         self.setLayout(layout)
 
-        qlogger = QLogger(self)
-        qlogger.message.connect(self.onMessage)
-        logger.addHandler(QLoggerHandler(qlogger))
+        self.log_handler = log_handler
+        self.timer_flush = QTimer(self)
+        self.timer_flush.timeout.connect(self.onFlush)
 
-    def onMessage(self, message: str):
-        self.edit_log.appendPlainText(message)
-        scroll_bar = self.edit_log.verticalScrollBar()
-        scroll_bar.setValue(scroll_bar.maximum())
+    def add_stats(self, name: str, stats: Callable[[], str]):
+        self.stats.append((name, stats))
+
+    def update_stats(self):
+        lines = [f"{name}: {stats()}" for name, stats in self.stats]
+        self.label_stats.setText("\n".join(lines))
+        self.label_stats.setVisible(len(lines) > 0)
+        if tracer.enabled:
+            self.label_trace.setText(tracer.summary())
+        self.label_trace.setVisible(tracer.enabled)
+
+    def set_progress(self, progress: dict):
+        if progress is None:
+            self.progress_export.setVisible(False)
+            return
+        self.progress_export.setValue(int(progress["percent"] * 10))
+        text = progress_text(progress)
+        if progress.get("frame"):
+            text += f" (frame {progress['frame']}, {progress['fps']:.1f} fps, {progress['bitrate']})"
+        self.progress_export.setFormat(text)
+        self.progress_export.setVisible(True)
+
+    def showEvent(self, event: QShowEvent) -> None:
+        self.onFlush()
+        self.update_stats()
+        self.timer_stats.start(1000)
+        # NOTE: while hidden the messages only collect in the ring buffer
+        self.timer_flush.start(100)
+        super().showEvent(event)
+
+    def hideEvent(self, event: QHideEvent) -> None:
+        self.timer_stats.stop()
+        self.timer_flush.stop()
+        super().hideEvent(event)
+
+    def onFlush(self):
+        messages, dropped = self.log_handler.take()
+        if not messages:
+            return
+        if dropped > 0:
+            messages.insert(0, f"... {dropped} older messages dropped")
+        self.edit_log.appendPlainText("\n".join(messages))
 
 
 class MainWindow(QMainWindow):
@@ -300,7 +1803,6 @@ class MainWindow(QMainWindow):
         self.setAcceptDrops(True)
         self.setWindowIcon(QIcon(os.path.join(basedir, "data", "icon.png")))
 
-        self.mimedb = QMimeDatabase()
         self.settings = QSettings()
         self._music_dir = self.settings.value("music_dir", "")
         if not os.path.exists(self._music_dir):
@@ -314,30 +1816,75 @@ class MainWindow(QMainWindow):
         self.timer_preview.timeout.connect(self.onTimeout)
         self.timer_resize = QTimer(self)
         self.timer_resize.setSingleShot(True)
-        self.timer_resize.timeout.connect(self.onListSelection)
+        self.timer_resize.timeout.connect(self.onResizeSettled)
+        self.resizing = False
         self.music_file = ""
-        self.image_cache: dict[str, QPixmap] = {}
-        self.player = QMediaPlayer(self)
-        self.player.setAudioOutput(QAudioOutput(QAudioDevice(), self))
-        self.player.audioOutput()  # NOTE: without this audio doesn't play
-        self.thread_generate = GenerateVideoThread(self)
-        self.thread_generate.finished.connect(self.onFinished)
+        self.image_cache = ImageCache(int(self.settings.value("image_cache_mb", 512)) * 1024 * 1024)
+        self.composite_cache = ImageCache(int(self.settings.value("composite_cache_mb", 256)) * 1024 * 1024)
+        self.prefetcher = PreviewPrefetcher(int(self.settings.value("prefetch_depth", 3)), self)
+        # NOTE: the player, the log dialog and the export thread are created on first use, see the properties below
+        self._player = None
+        self.thread_import = ImportThread(self)
+        self.thread_import.found.connect(self.onImportFound)
+        self.thread_import.done.connect(self.onImportFinished)
+        self.import_row = 0
+        self.import_keys: list[tuple] = []
+        self.import_slides: list[int] = []
+        self.import_start = 0.0
+        self.importing = False
+        self._thread_generate = None
+        # Every preview prepares its music on a new thread, the results of stopped previews are ignored by their generation
+        self.audio_threads: list[PrepareAudioThread] = []
+        self.audio_generation = 0
+        self.preparing_audio = False
         self.fade_in = False
         self.fade_out = True
 
-        self.dialog_log = LogDialog(self)
-
-        self.list_images = QListWidget()
+        # The messages collect in the ring buffer until the log dialog is shown
+        self.log_handler = QLoggerHandler(int(self.settings.value("log_max_lines", 20000)))
+        logger.addHandler(self.log_handler)
+        self._dialog_log = None
+        self.export_timings: dict[str, str] = {}
+
+        icon_size = QSize(120, 68)
+        self.slides = SlideModel(icon_size, int(self.settings.value("thumbnail_cache_mb", 64)) * 1024 * 1024, self)
+        self.slides.icon_needed.connect(self.schedule_thumbnails)
+        hash_path = os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "hashes.json")
+        self.hash_index = HashIndex(hash_path, parent=self)
+        self.hash_index.finished.connect(self.onHashesFinished)
+        self.hash_index.grouped.connect(self.onDuplicatesGrouped)
+        self.hash_index.hashed.connect(self.onHashProgress)
+        self.finding_duplicates = False
+        self.duplicates_start = 0.0
+        self.list_images = SlideView()
+        # NOTE: every row has the same height, so the view does not have to measure 10k rows
+        self.list_images.setUniformItemSizes(True)
+        self.list_images.setModel(self.slides)
         self.list_images.setDragEnabled(True)
-        self.list_images.setDragDropMode(QListWidget.DragDropMode.InternalMove)
-        self.list_images.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
-        self.list_images.setIconSize(QSize(120, 68))
-        self.list_images.itemSelectionChanged.connect(self.onListSelection)
+        self.list_images.setDragDropMode(QListView.DragDropMode.InternalMove)
+        self.list_images.setSelectionMode(QListView.SelectionMode.SingleSelection)
+        self.list_images.setIconSize(icon_size)
+        def onCurrentRowChanged(current, previous):
+            self.onListSelection()
+        self.list_images.selectionModel().currentRowChanged.connect(onCurrentRowChanged)
+
+        self.thumbnail_loader = RenderLoader(self)
+        self.thumbnail_loader.loaded.connect(self.onThumbnailLoaded)
+        self.thumbnail_loader.failed.connect(self.onThumbnailFailed)
+        self.timer_thumbnails = QTimer(self)
+        self.timer_thumbnails.setSingleShot(True)
+        self.timer_thumbnails.timeout.connect(self.request_thumbnails)
+        self.thumbnail_errors: list[str] = []
+        self.timer_thumbnail_errors = QTimer(self)
+        self.timer_thumbnail_errors.setSingleShot(True)
+        self.timer_thumbnail_errors.timeout.connect(self.onThumbnailErrors)
 
         self.label_image = QLabel()
         self.label_image.resize(1920, 1080)
         self.label_image.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         self.label_image.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        # NOTE: otherwise the pixmap prevents the window from shrinking
+        self.label_image.setMinimumSize(1, 1)
 
         self.label_author = QLabel(f"<a href=\"https://github.com/mrexodia/LiveVisionBoard\">{self.tr('About')}</a>")
         self.label_author.setTextInteractionFlags(Qt.TextInteractionFlag.TextBrowserInteraction)
@@ -345,12 +1892,20 @@ class MainWindow(QMainWindow):
         self.button_clear = QPushButton(self.tr("Clear"))
         self.button_clear.clicked.connect(self.onImageClear)
         self.button_clear.setToolTip(self.tr("Remove all images"))
+        self.button_open = QPushButton(self.tr("Open"))
+        self.button_open.clicked.connect(self.onProjectOpen)
+        self.button_open.setToolTip(self.tr("Open a project (Ctrl+O)"))
+        self.button_save = QPushButton(self.tr("Save"))
+        self.button_save.clicked.connect(self.onProjectSave)
+        self.button_save.setToolTip(self.tr("Save the images and settings as a project (Ctrl+S)"))
 
         layout_list_bottom = QHBoxLayout()
         layout_list_bottom.setSpacing(4)
         layout_list_bottom.setContentsMargins(0, 0, 0, 0)
         layout_list_bottom.addWidget(self.label_author)
         layout_list_bottom.addStretch()
+        layout_list_bottom.addWidget(self.button_open)
+        layout_list_bottom.addWidget(self.button_save)
         layout_list_bottom.addWidget(self.button_clear)
 
         layout_list_label = QVBoxLayout()
@@ -365,10 +1920,20 @@ class MainWindow(QMainWindow):
         self.button_add.clicked.connect(self.onImageAdd)
         self.button_add.setToolTip(self.tr("Add new image after selection"))
         self.button_add.setMaximumWidth(max_width)
+        self.button_add_folder = QPushButton("📁")
+        self.button_add_folder.setToolTip(self.tr("Add the images in a folder (and its subfolders) after selection"))
+        self.button_add_folder.setMaximumWidth(max_width)
+        menu_add_folder = QMenu(self.button_add_folder)
+        menu_add_folder.addAction(self.tr("Sorted by file name..."), lambda: self.onImageAddFolder("name"))
+        menu_add_folder.addAction(self.tr("Sorted by capture time..."), lambda: self.onImageAddFolder("time"))
+        self.button_add_folder.setMenu(menu_add_folder)
         self.button_remove = QPushButton("-")
         self.button_remove.clicked.connect(self.onImageRemove)
         self.button_remove.setToolTip(self.tr("Remove selected image"))
         self.button_remove.setMaximumWidth(max_width)
+        self.button_duplicates = QPushButton("≈")
+        self.button_duplicates.clicked.connect(self.onFindDuplicates)
+        self.button_duplicates.setMaximumWidth(max_width)
         self.button_up = QPushButton("↑")
         self.button_up.setToolTip(self.tr("Move selected image up"))
         self.button_up.clicked.connect(self.onImageUp)
@@ -383,7 +1948,9 @@ class MainWindow(QMainWindow):
         layout_list_buttons.setContentsMargins(0, 0, 0, 0)
         layout_list_buttons.addStretch()
         layout_list_buttons.addWidget(self.button_add)
+        layout_list_buttons.addWidget(self.button_add_folder)
         layout_list_buttons.addWidget(self.button_remove)
+        layout_list_buttons.addWidget(self.button_duplicates)
         layout_list_buttons.addSpacing(10)
         layout_list_buttons.addWidget(self.button_up)
         layout_list_buttons.addWidget(self.button_down)
@@ -397,7 +1964,7 @@ class MainWindow(QMainWindow):
         self.label_time = QLabel(self.tr("Per slide:"))
         self.spin_duration = DoubleSpinBox()
         self.spin_duration.setToolTip(self.tr("Seconds per slide"))
-        self.spin_duration.setRange(0.1, 60.0)
+        self.spin_duration.setRange(*SLIDE_DURATION_RANGE)
         self.spin_duration.setSingleStep(0.1)
         self.spin_duration.setValue(1.0)
         self.spin_duration.setSuffix("s")
@@ -428,6 +1995,16 @@ class MainWindow(QMainWindow):
         self.button_preview.clicked.connect(self.onPreview)
         self.button_generate = QPushButton(self.tr("Save Video"))
         self.button_generate.clicked.connect(self.onGenerate)
+        self.combo_profile = QComboBox()
+        self.combo_profile.setToolTip(self.tr("Export quality (draft is fast, archival is slow)"))
+        self.combo_profile.addItem(self.tr("Draft (720p)"), "draft")
+        self.combo_profile.addItem(self.tr("Standard (1080p)"), "standard")
+        self.combo_profile.addItem(self.tr("Archival (4K)"), "archival")
+        self.combo_profile.addItem(self.tr("Vertical (1080x1920)"), "vertical")
+        self.set_profile(self.settings.value("export_profile", DEFAULT_PROFILE))
+        def onProfileChanged(index):
+            self.settings.setValue("export_profile", self.combo_profile.itemData(index))
+        self.combo_profile.currentIndexChanged.connect(onProfileChanged)
 
         layout_preview_buttons = QHBoxLayout()
         layout_preview_buttons.setSpacing(4)
@@ -443,6 +2020,7 @@ class MainWindow(QMainWindow):
         layout_preview_buttons.addWidget(self.checkbox_fade_out)
         layout_preview_buttons.addStretch(4)
         layout_preview_buttons.addWidget(self.button_preview)
+        layout_preview_buttons.addWidget(self.combo_profile)
         layout_preview_buttons.addWidget(self.button_generate)
 
         layout_preview = QVBoxLayout()
@@ -469,6 +2047,16 @@ class MainWindow(QMainWindow):
         self.action_log.setShortcutContext(Qt.ShortcutContext.ApplicationShortcut)
         self.addAction(self.action_log)
 
+        self.action_open = QAction(self.tr("Open project"))
+        self.action_open.triggered.connect(self.onProjectOpen)
+        self.action_open.setShortcut("Ctrl+O")
+        self.addAction(self.action_open)
+
+        self.action_save = QAction(self.tr("Save project"))
+        self.action_save.triggered.connect(self.onProjectSave)
+        self.action_save.setShortcut("Ctrl+S")
+        self.addAction(self.action_save)
+
         self.update_buttons()
 
     @property
@@ -495,18 +2083,115 @@ class MainWindow(QMainWindow):
         if not self.music_dir:
             self.music_dir = value
 
+    @property
+    def project_dir(self):
+        return self.settings.value("project_dir", self.image_dir)
+
+    @project_dir.setter
+    def project_dir(self, value):
+        self.settings.setValue("project_dir", value)
+        self.settings.sync()
+
+    @property
+    def player(self):
+        if self._player is None:
+            # NOTE: importing QtMultimedia and starting the audio backend is slow, so it waits for the first preview
+            from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput, QAudioDevice
+            self._player = QMediaPlayer(self)
+            self._player.setAudioOutput(QAudioOutput(QAudioDevice(), self))
+            self._player.audioOutput()  # NOTE: without this audio doesn't play
+        return self._player
+
+    @property
+    def dialog_log(self):
+        if self._dialog_log is None:
+            self._dialog_log = LogDialog(self, self.log_handler)
+            self._dialog_log.add_stats(self.tr("Image cache"), self.image_cache.stats)
+            self._dialog_log.add_stats(self.tr("Composite cache"), self.composite_cache.stats)
+            self._dialog_log.add_stats(self.tr("Thumbnail cache"), self.slides.icons.stats)
+            self._dialog_log.add_stats(self.tr("Preview prefetch"), self.prefetcher.stats)
+            self._dialog_log.add_stats(self.tr("Duplicate index"), self.hash_index.stats)
+            self._dialog_log.add_stats(self.tr("Exports"), self.export_stats)
+        return self._dialog_log
+
+    @property
+    def thread_generate(self):
+        if self._thread_generate is None:
+            self._thread_generate = GenerateVideoThread(self)
+            self._thread_generate.finished.connect(self.onFinished)
+            self._thread_generate.progress.connect(self.onGenerateProgress)
+        return self._thread_generate
+
+    def prepare_preview_audio(self):
+        self.audio_generation += 1
+        thread = PrepareAudioThread(
+            self.audio_generation,
+            self.music_file,
+            self.spin_duration.value() * self.list_images.count(),
+            self.fade_in,
+            self.fade_out,
+            self.audio_cache(),
+            self,
+        )
+        thread.prepared.connect(self.onAudioPrepared)
+        thread.finished.connect(lambda: self.onAudioThreadFinished(thread))
+        self.audio_threads.append(thread)
+        thread.start()
+
+    def onAudioThreadFinished(self, thread: PrepareAudioThread):
+        self.audio_threads.remove(thread)
+        thread.deleteLater()
+
+    def wait_for_audio(self):
+        for thread in self.audio_threads:
+            thread.wait()
+
+    def audio_cache(self):
+        # The exports and the preview share the prepared music
+        audio_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "audio")
+        audio_mb = int(self.settings.value("audio_cache_mb", 512))
+        return ConversionCache(audio_dir, audio_mb * 1024 * 1024)
+
+    @property
+    def profile(self):
+        return self.combo_profile.currentData()
+
+    def set_profile(self, profile: str):
+        index = self.combo_profile.findData(profile)
+        if index != -1:
+            self.combo_profile.setCurrentIndex(index)
+
+    def export_stats(self):
+        if not self.export_timings:
+            return self.tr("none")
+        return ", ".join(f"{profile} {timing}" for profile, timing in self.export_timings.items())
+
     def update_buttons(self):
-        editing = not self.is_previewing
+        # NOTE: the list can be browsed during an import, but not reordered (see onImportFound)
+        editing = not self.is_previewing and not self.importing and not self.finding_duplicates
         count = self.list_images.count()
         row = self.list_images.currentRow()
-        self.list_images.setEnabled(editing)
+        self.list_images.setEnabled(not self.is_previewing)
+        self.list_images.setDragEnabled(editing)
         self.button_clear.setEnabled(editing and count > 0)
+        self.button_open.setEnabled(editing)
+        self.button_save.setEnabled(editing and count > 0)
+        self.action_open.setEnabled(editing)
+        self.action_save.setEnabled(editing and count > 0)
         self.button_generate.setEnabled(editing and count > 0)
+        self.combo_profile.setEnabled(editing)
         self.button_preview.setEnabled(count > 0)
         preview_text = self.tr("Stop") if self.is_previewing else self.tr("Preview")
         self.button_preview.setText(preview_text)
         self.button_add.setEnabled(editing)
+        self.button_add_folder.setEnabled(editing)
         self.button_remove.setEnabled(editing and row != -1)
+        # Pressed again to stop finding duplicates
+        self.button_duplicates.setEnabled(self.finding_duplicates or (editing and count > 1))
+        if self.finding_duplicates:
+            self.button_duplicates.setToolTip(self.tr("Stop finding duplicates"))
+        else:
+            self.button_duplicates.setToolTip(self.tr("Find duplicate and near-duplicate images"))
         self.button_up.setEnabled(editing and row > 0)
         self.button_down.setEnabled(editing and row + 1 < count)
         self.spin_duration.setEnabled(editing)
@@ -517,113 +2202,230 @@ class MainWindow(QMainWindow):
         self.checkbox_fade_in.setEnabled(editing and has_music)
         self.checkbox_fade_out.setEnabled(editing and has_music)
 
-    def read_image_cache(self, path: str):
-        if path in self.image_cache:
-            return self.image_cache[path]
-        reader = QImageReader(path)
-        if not reader.canRead():
-            raise Exception(reader.errorString())
-        pixmap = QPixmap.fromImageReader(reader)
-        self.image_cache[path] = pixmap
-        # Evict images from the cache
-        if len(self.image_cache) > 20:
-            first_key = None
-            for key in self.image_cache:
-                first_key = key
-                break
-            del self.image_cache[first_key]
-        return pixmap
+    def read_image_cache(self, path: str, size: QSize):
+        key = (path, size.width(), size.height())
+        image = self.image_cache.get(key)
+        if image is not None:
+            return image
+        image, error = read_scaled(path, size)
+        if error is not None:
+            raise Exception(error)
+        self.image_cache.put(key, image)
+        return image
 
     def read_image(self, path: str, size: QSize):
-        pixmap = self.read_image_cache(path)
+        key = (path, size.width(), size.height())
+        pixmap = self.composite_cache.get(key)
+        if pixmap is None:
+            with tracer.span("preview", path=path):
+                pixmap = QPixmap.fromImage(compose_image(self.read_image_cache(path, size), size))
+            self.composite_cache.put(key, pixmap)
+        return pixmap
 
-        # Blur the stretched for the background
-        blurred = pixmap.scaled(size)
-        blurred = self.blur_image(blurred, 50)
-        blurred = self.blur_image(blurred, 20)
+    def nearest_composite(self, path: str, size: QSize):
+        nearest = None
+        nearest_distance = 0
+        for key in self.composite_cache.entries:
+            if key[0] == path:
+                distance = abs(key[1] - size.width()) + abs(key[2] - size.height())
+                if nearest is None or distance < nearest_distance:
+                    nearest = key
+                    nearest_distance = distance
+        if nearest is None:
+            return None
+        return self.composite_cache.get(nearest)
+
+    def add_images(self, paths: list[str], fingerprints: list[list[int]] = None):
+        # The thumbnails are rendered when their rows become visible, see request_thumbnails
+        row = self.list_images.currentRow() + 1
+        self.slides.insert(row, paths, fingerprints)
+        if paths:
+            self.list_images.setCurrentRow(row + len(paths) - 1)
+        self.update_buttons()
 
-        # Resize the main image
-        if pixmap.height() > size.height():
-            pixmap = pixmap.scaledToHeight(size.height(), Qt.TransformationMode.SmoothTransformation)
-        if pixmap.width() > size.width():
-            pixmap = pixmap.scaledToWidth(size.width(), Qt.TransformationMode.SmoothTransformation)
+    def schedule_thumbnails(self):
+        # Called for every row that is painted without a thumbnail, handle them together
+        if not self.timer_thumbnails.isActive():
+            self.timer_thumbnails.start(0)
 
-        # Draw the final result
-        result = QPixmap(size)
-        result.fill(Qt.GlobalColor.transparent)
-        with QPainter(result) as painter:
-            painter.drawPixmap(QPoint(0, 0), blurred)
-            midx = (size.width() / 2) - (pixmap.width() / 2)
-            midy = (size.height() / 2) - (pixmap.height() / 2)
-            painter.drawPixmap(QPoint(midx, midy), pixmap)
-        return result
+    def request_thumbnails(self):
+        visible = self.list_images.visibleRows()
+        if not visible:
+            return
+        # Also render the next page, the pending jobs for the rows that scrolled away are cancelled
+        wanted = range(visible.start, min(self.list_images.count(), visible.stop + len(visible)))
+        keys = {self.slides.keys[row] for row in wanted}
+        for key in list(self.thumbnail_loader.jobs):
+            if key not in keys:
+                self.thumbnail_loader.cancel(key)
+        missing: list[int] = []
+        for row in wanted:
+            key = self.slides.keys[row]
+            priority = 1 if row in visible else 0
+            if key in self.slides.icons:
+                continue
+            if key in self.thumbnail_loader.jobs:
+                if priority:
+                    self.thumbnail_loader.prioritize(key)
+                continue
+            path = self.slides.paths[row]
+            # Images from a project are checked when they become visible
+            fingerprint = self.slides.fingerprints.pop(key, None)
+            if fingerprint is not None:
+                current = file_fingerprint(path)
+                if current is None:
+                    missing.append(key)
+                    continue
+                if fingerprint and current != list(fingerprint):
+                    logger.warning(f"{path} changed since the project was saved")
+                    self.slides.tooltips[key] = self.tr("Changed since the project was saved")
+            self.thumbnail_loader.request(key, path, self.list_images.iconSize(), priority)
+        # NOTE: removed after the loop, because it shifts the rows
+        for key in missing:
+            self.onThumbnailFailed(key, self.tr("File not found"))
+
+    def onThumbnailLoaded(self, key: int, image: QImage):
+        self.slides.set_icon(key, QPixmap.fromImage(image))
+        self.list_images.viewport().update()
+
+    def onThumbnailFailed(self, key: int, error: str):
+        row = self.slides.row(key)
+        if row == -1:
+            return
+        path = self.slides.paths[row]
+        logger.error(f"Failed to read {path}: {error}")
+        self.slides.remove(row)
+        self.thumbnail_errors.append(self.tr("{0}\n\n{1}").format(error, path))
+        # Report the errors of a whole batch in a single message box
+        self.timer_thumbnail_errors.start(0)
+        self.update_buttons()
 
-    def add_image(self, path: str):
-        try:
-            icon_size = self.list_images.iconSize()
-            icon = self.read_image(path, icon_size)
-            item = QListWidgetItem()
-            item.setData(Qt.ItemDataRole.UserRole, path)
-            item.setText(os.path.basename(path))
-            item.setIcon(icon)
-            row = self.list_images.currentRow() + 1
-            self.list_images.insertItem(row, item)
-            self.list_images.setCurrentRow(row)
-        except Exception as x:
+    def onThumbnailErrors(self):
+        errors = self.thumbnail_errors
+        self.thumbnail_errors = []
+        if errors:
             QMessageBox.critical(
                 self,
                 self.tr("Error"),
-                self.tr("{0}\n\n{1}").format(
-                    str(x),
-                    path,
-                ),
+                "\n\n".join(errors),
             )
 
-    def add_images(self, paths: list[str]):
-        self.list_images.setUpdatesEnabled(False)
-        for path in paths:
-            self.add_image(path)
-        self.list_images.setUpdatesEnabled(True)
-        self.onListSelection()
-
-    def blur_image(self, pixmap: QPixmap, radius: float):
-        scene = QGraphicsScene()
-        item = QGraphicsPixmapItem()
-        item.setPixmap(pixmap)
-        blur = QGraphicsBlurEffect(scene)
-        blur.setBlurRadius(radius)
-        blur.setBlurHints(QGraphicsBlurEffect.BlurHint.QualityHint)
-        item.setGraphicsEffect(blur)
-        scene.addItem(item)
-        blurred = QPixmap(pixmap.size())
-        blurred.fill(Qt.GlobalColor.transparent)
-        with QPainter(blurred) as painter:
-            scene.render(painter, QRectF(), QRectF(0, 0, pixmap.width(), pixmap.height()))
-        return blurred
-
-    def get_accepted_urls(self, urls: list[QUrl]):
-        result: list[QUrl] = []
+    def get_accepted_paths(self, urls: list[QUrl]):
+        # NOTE: only the extensions are checked here, folders and the file contents are scanned by ImportThread
+        result: list[str] = []
         for url in urls:
-            if self.mimedb.mimeTypeForUrl(url).name().startswith("image/"):
-                result.append(url)
+            path = url.toLocalFile()
+            if path and (os.path.isdir(path) or is_image_file(path)):
+                result.append(path)
         return result
 
     def dragEnterEvent(self, event: QDragEnterEvent) -> None:
-        accepted_urls = self.get_accepted_urls(event.mimeData().urls())
-        if len(accepted_urls) > 0:
+        accepted_paths = self.get_accepted_paths(event.mimeData().urls())
+        # NOTE: the duplicates are found by row, the rows should not change in the meantime.
+        # A second import would interrupt the running one, like the add buttons it waits until the import is done
+        if len(accepted_paths) > 0 and not self.is_previewing and not self.importing and not self.finding_duplicates:
             event.accept()
         else:
             event.ignore()
 
     def dropEvent(self, event: QDropEvent) -> None:
-        accepted_urls = self.get_accepted_urls(event.mimeData().urls())
-        self.add_images([url.path() for url in accepted_urls])
+        accepted_paths = self.get_accepted_paths(event.mimeData().urls())
+        self.import_images(accepted_paths, self.settings.value("import_sort", "name"))
+
+    def import_images(self, paths: list[str], sort: str):
+        self.stop_import()
+        # The images are inserted after the selection, in the order of their sort keys
+        self.import_row = self.list_images.currentRow() + 1
+        self.import_start = time.perf_counter()
+        self.thread_import.paths = paths
+        self.thread_import.sort = sort
+        self.thread_import.generation += 1
+        self.thread_import.start()
+        self.importing = True
+        self.update_title()
+        self.update_buttons()
+
+    def stop_import(self):
+        if self.thread_import.isRunning():
+            self.thread_import.requestInterruption()
+            self.thread_import.wait()
+        # The batches that are still queued are ignored
+        self.thread_import.generation += 1
+        self.importing = False
+        self.import_keys = []
+        self.import_slides = []
+        self.update_title()
+        self.update_buttons()
+
+    def onImportFound(self, generation: int, batch: list[tuple[tuple, str]]):
+        if generation != self.thread_import.generation:
+            return
+        self.list_images.setUpdatesEnabled(False)
+        for key, path in batch:
+            index = bisect.bisect(self.import_keys, key)
+            if index < len(self.import_slides):
+                row = self.slides.row(self.import_slides[index])
+            elif self.import_slides:
+                # Appending is the common case, avoid the linear search in row()
+                last = self.import_slides[-1]
+                if 0 < self.import_row <= self.list_images.count() and self.slides.keys[self.import_row - 1] == last:
+                    row = self.import_row
+                else:
+                    row = self.slides.row(last) + 1
+            else:
+                row = min(self.import_row, self.list_images.count())
+            if row == -1:  # removed while importing
+                row = self.list_images.count()
+            self.import_keys.insert(index, key)
+            self.import_slides.insert(index, self.slides.insert(row, [path])[0])
+            if index == len(self.import_slides) - 1:
+                self.import_row = row + 1
+        self.list_images.setUpdatesEnabled(True)
+        if self.list_images.currentRow() == -1:
+            self.list_images.setCurrentRow(0)
+        self.update_title()
+        self.update_buttons()
+
+    def onImportFinished(self, generation: int):
+        if generation != self.thread_import.generation:
+            return
+        logger.info(f"Imported {len(self.import_slides)} images in {time.perf_counter() - self.import_start:.2f}s")
+        if self.import_slides:
+            row = self.slides.row(self.import_slides[0])
+            if row != -1:
+                self.list_images.setCurrentRow(row)
+        self.import_keys = []
+        self.import_slides = []
+        self.importing = False
+        self.update_title()
+        self.update_buttons()
+
+    def update_title(self):
+        if self.importing:
+            self.setWindowTitle(self.tr("{} (importing: {} images)").format(QApplication.applicationName(), len(self.import_slides)))
+        elif self.preparing_audio:
+            self.setWindowTitle(self.tr("{} (preparing music)").format(QApplication.applicationName()))
+        elif self.finding_duplicates:
+            self.setWindowTitle(self.tr("{} (finding duplicates: {} images left)").format(QApplication.applicationName(), len(self.hash_index.pending)))
+        else:
+            self.setWindowTitle(QApplication.applicationName())
 
     def resizeEvent(self, event: QResizeEvent) -> None:
-        # Resize the image with a debounce
-        self.label_image.setPixmap(QPixmap())
+        # Stretch the current composite while resizing and render it again with a debounce
+        self.resizing = True
+        self.label_image.setScaledContents(True)
         self.timer_resize.start(250)
 
+    def onResizeSettled(self):
+        self.resizing = False
+        self.label_image.setScaledContents(False)
+        # Entries for the other sizes will not be shown again
+        size = self.label_image.size()
+        self.composite_cache.retain(lambda key: key[1:] == (size.width(), size.height()))
+        self.image_cache.retain(lambda key: key[1:] == (size.width(), size.height()))
+        self.prefetcher.clear()
+        self.onListSelection()
+
     def onListSelection(self):
         if not self.list_images.updatesEnabled():
             return
@@ -632,10 +2434,21 @@ class MainWindow(QMainWindow):
         if row == -1:
             self.label_image.setPixmap(QPixmap())
         else:
-            item = self.list_images.item(row)
-            path: str = item.data(Qt.ItemDataRole.UserRole)
+            path = self.slides.paths[row]
             try:
-                preview = self.read_image(path, self.label_image.size())
+                size = self.label_image.size()
+                preview = None
+                if self.resizing:
+                    # The label stretches it until the size settles, see onResizeSettled
+                    preview = self.nearest_composite(path, size)
+                elif self.is_previewing and (path, size.width(), size.height()) not in self.composite_cache:
+                    # Use the slide that was rendered in the background, see schedule_prefetch
+                    prefetched = self.prefetcher.take(path, size)
+                    if prefetched is not None:
+                        preview = QPixmap.fromImage(prefetched)
+                        self.composite_cache.put((path, size.width(), size.height()), preview)
+                if preview is None:
+                    preview = self.read_image(path, size)
                 self.label_image.setPixmap(preview)
             except Exception as x:
                 QMessageBox.critical(
@@ -646,6 +2459,35 @@ class MainWindow(QMainWindow):
                         path
                     )
                 )
+            if self.is_previewing:
+                self.schedule_prefetch()
+        self.update_buttons()
+
+    def schedule_prefetch(self):
+        row = self.list_images.currentRow()
+        size = self.label_image.size()
+        paths = []
+        for path in self.slides.paths[row + 1:row + 1 + self.prefetcher.depth]:
+            if (path, size.width(), size.height()) not in self.composite_cache:
+                paths.append(path)
+        self.prefetcher.schedule(paths, size)
+
+    def stop_preview(self):
+        self.is_previewing = False
+        # NOTE: the music keeps preparing in the background, the next preview finds it in the cache
+        self.preparing_audio = False
+        self.update_title()
+        if self._player is not None:
+            self._player.stop()
+        self.timer_preview.stop()
+        self.prefetcher.clear()
+        logger.info(f"Preview prefetch: {self.prefetcher.stats()}")
+
+    def clear_images(self):
+        self.stop_import()
+        self.thumbnail_loader.cancel_all()
+        self.slides.clear()
+        self.onListSelection()
         self.update_buttons()
 
     def onImageClear(self):
@@ -656,9 +2498,82 @@ class MainWindow(QMainWindow):
             QMessageBox.StandardButton.Yes,
             QMessageBox.StandardButton.No,
         ) == QMessageBox.StandardButton.Yes:
-            self.list_images.clear()
-            self.onListSelection()
-            self.update_buttons()
+            self.clear_images()
+
+    def onProjectOpen(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            self.tr("Open project"),
+            self.project_dir,
+            self.tr("LiveVisionBoard project (*.lvb)")
+        )
+        if not path:
+            return
+        self.project_dir = os.path.dirname(path)
+        try:
+            board = load_manifest(path)
+        except (OSError, ValueError) as x:
+            QMessageBox.critical(
+                self,
+                self.tr("Error"),
+                self.tr("{0}\n\n{1}").format(
+                    str(x),
+                    path
+                )
+            )
+            return
+
+        if self.list_images.count() > 0 and QMessageBox.question(
+            self,
+            self.tr("Confirm"),
+            self.tr("Are you sure you want to replace the current images?"),
+            QMessageBox.StandardButton.Yes,
+            QMessageBox.StandardButton.No,
+        ) != QMessageBox.StandardButton.Yes:
+            return
+
+        self.clear_images()
+        self.spin_duration.setValue(board["duration"])
+        if board["music"]:
+            self.set_music(board["music"])
+        else:
+            self.onMusicRemove()
+        self.checkbox_fade_in.setChecked(board["fade_in"])
+        self.checkbox_fade_out.setChecked(board["fade_out"])
+        if board["profile"]:
+            self.set_profile(board["profile"])
+        # NOTE: an empty fingerprint still defers the decoding, but skips the change check
+        fingerprints = [fingerprint or [] for fingerprint in board["fingerprints"]]
+        self.add_images(board["images"], fingerprints)
+        self.list_images.setCurrentRow(0)
+        logger.info(f"Opened project {path} ({len(board['images'])} images)")
+
+    def onProjectSave(self):
+        if self.list_images.count() == 0:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            self.tr("Save project"),
+            self.project_dir,
+            self.tr("LiveVisionBoard project (*.lvb)")
+        )
+        if not path:
+            return
+        self.project_dir = os.path.dirname(path)
+        images = list(self.slides.paths)
+        try:
+            save_project(path, images, self.spin_duration.value(), self.music_file, self.fade_in, self.fade_out, self.profile)
+        except OSError as x:
+            QMessageBox.critical(
+                self,
+                self.tr("Error"),
+                self.tr("{0}\n\n{1}").format(
+                    str(x),
+                    path
+                )
+            )
+            return
+        logger.info(f"Saved project {path} ({len(images)} images)")
 
     def onImageAdd(self):
         paths, _ = QFileDialog.getOpenFileNames(
@@ -671,37 +2586,104 @@ class MainWindow(QMainWindow):
             self.image_dir = os.path.dirname(paths[0])
         self.add_images(paths)
 
+    def onImageAddFolder(self, sort: str):
+        path = QFileDialog.getExistingDirectory(self, self.tr("Add folder"), self.image_dir)
+        if not path:
+            return
+        self.image_dir = path
+        # Drops use the last chosen order
+        self.settings.setValue("import_sort", sort)
+        self.import_images([path], sort)
+
     def onImageRemove(self):
-        row_num = self.list_images.currentRow()
-        if row_num >= 0:
-            item = self.list_images.takeItem(row_num)
-            del item
+        row = self.list_images.currentRow()
+        if row >= 0:
+            self.thumbnail_loader.cancel(self.slides.keys[row])
+            self.slides.remove(row)
         self.update_buttons()
 
-    def onImageUp(self):
-        row_num = self.list_images.currentRow()
-        if row_num > 0:
-            row = self.list_images.itemWidget(self.list_images.currentItem())
-            itemN = self.list_images.currentItem().clone()
+    def onFindDuplicates(self):
+        if self.finding_duplicates:
+            self.hash_index.cancel()
+            self.finding_duplicates = False
+        else:
+            self.finding_duplicates = True
+            self.duplicates_start = time.perf_counter()
+            self.hash_index.request(self.slides.paths)
+        self.update_title()
+        self.update_buttons()
 
-            self.list_images.insertItem(row_num - 1, itemN)
-            self.list_images.setItemWidget(itemN, row)
+    def onHashProgress(self):
+        # Updating the title for every image is too slow on some window managers
+        if self.finding_duplicates and len(self.hash_index.pending) % 50 == 0:
+            self.update_title()
 
-            self.list_images.takeItem(row_num + 1)
-            self.list_images.setCurrentRow(row_num - 1)
-        self.update_buttons()
+    def onHashesFinished(self):
+        if self.finding_duplicates:
+            self.hash_index.group(self.slides.paths, int(self.settings.value("duplicate_distance", 6)))
 
-    def onImageDown(self):
-        row_num = self.list_images.currentRow()
-        if row_num >= 0 and row_num +1 < self.list_images.count():
-            row = self.list_images.itemWidget(self.list_images.currentItem())
-            itemN = self.list_images.currentItem().clone()
+    def onDuplicatesGrouped(self, generation: int, groups: list[list[int]]):
+        if not self.finding_duplicates or generation != self.hash_index.generation:
+            return
+        self.finding_duplicates = False
+        self.update_title()
+        self.update_buttons()
+        duplicates = sum(len(group) - 1 for group in groups)
+        logger.info(f"Found {duplicates} duplicates in {len(groups)} groups in {time.perf_counter() - self.duplicates_start:.2f}s")
+        if duplicates == 0:
+            QMessageBox.information(self, self.tr("Duplicates"), self.tr("No duplicate images found."))
+            return
+        # List every group, so it is clear which images are removed
+        details = []
+        for number, group in enumerate(groups, 1):
+            details.append(self.tr("Group {0}:").format(number))
+            for row in group:
+                action = self.tr("keep") if row == group[0] else self.tr("remove")
+                details.append(f"  {action} {row + 1}: {self.slides.paths[row]}")
+        box = QMessageBox(
+            QMessageBox.Icon.Question,
+            self.tr("Duplicates"),
+            self.tr("Found {0} duplicate or near-duplicate images in {1} groups (see the details).\n\nRemove them and keep the first image of each group?").format(duplicates, len(groups)),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            self,
+        )
+        box.setDetailedText("\n".join(details))
+        box.setDefaultButton(QMessageBox.StandardButton.No)
+        # The first duplicate is selected, so it is visible in the list behind the message
+        self.list_images.setCurrentRow(groups[0][1])
+        if box.exec() != QMessageBox.StandardButton.Yes:
+            return
+        self.remove_rows(sorted(row for group in groups for row in group[1:]))
+        logger.info(f"Removed {duplicates} duplicates")
+
+    def remove_rows(self, rows: list[int]):
+        # Removes runs of rows at once, from the bottom so the rows above stay valid
+        runs: list[list[int]] = []
+        for row in rows:
+            if runs and runs[-1][0] + runs[-1][1] == row:
+                runs[-1][1] += 1
+            else:
+                runs.append([row, 1])
+        for row, count in reversed(runs):
+            for key in self.slides.keys[row:row + count]:
+                self.thumbnail_loader.cancel(key)
+            self.slides.remove(row, count)
+        self.update_buttons()
 
-            self.list_images.insertItem(row_num + 2, itemN)
-            self.list_images.setItemWidget(itemN, row)
+    def onImageUp(self):
+        row = self.list_images.currentRow()
+        if row > 0:
+            self.slides.move(row, row - 1)
+            self.list_images.viewport().update()
+            self.list_images.setCurrentRow(row - 1)
+        self.update_buttons()
 
-            self.list_images.takeItem(row_num)
-            self.list_images.setCurrentRow(row_num+1)
+    def onImageDown(self):
+        row = self.list_images.currentRow()
+        if row >= 0 and row + 1 < self.list_images.count():
+            self.slides.move(row, row + 1)
+            self.list_images.viewport().update()
+            self.list_images.setCurrentRow(row + 1)
         self.update_buttons()
 
     def onMusic(self):
@@ -714,8 +2696,11 @@ class MainWindow(QMainWindow):
         if not path:
             return
 
-        self.music_file = path
         self.music_dir = os.path.dirname(path)
+        self.set_music(path)
+
+    def set_music(self, path: str):
+        self.music_file = path
         filename = os.path.basename(path)
         self.label_music.setText(filename)
         self.label_music.setToolTip(filename)
@@ -728,28 +2713,43 @@ class MainWindow(QMainWindow):
         self.update_buttons()
 
     def onPreview(self):
-        self.is_previewing = not self.is_previewing
-        if self.is_previewing:
-            if self.music_file:
-                # TODO: integrate the fade (https://stackoverflow.com/a/70218571/1806760)
-                self.player.setSource(QUrl.fromLocalFile(self.music_file))
-                self.player.play()
+        if not self.is_previewing:
+            self.is_previewing = True
             self.preview_selection = self.list_images.currentRow()
             self.list_images.setCurrentRow(0)
-            self.timer_preview.start(int(self.spin_duration.value() * 1000) + 50)
+            self.schedule_prefetch()
+            # The first slide is rendered synchronously, it has no deadline to miss
+            self.prefetcher.reset_stats()
+            if self.music_file:
+                # The slides start together with the faded music, once it is prepared (usually a cache hit)
+                self.preparing_audio = True
+                self.update_title()
+                self.prepare_preview_audio()
+            else:
+                self.timer_preview.start(int(self.spin_duration.value() * 1000))
         else:
-            self.player.stop()
-            self.timer_preview.stop()
+            self.stop_preview()
             self.list_images.setCurrentRow(self.preview_selection)
             self.list_images.setFocus()
         self.update_buttons()
 
+    def onAudioPrepared(self, generation: int, music: str, audio: str, error: str):
+        if generation != self.audio_generation or not self.preparing_audio:
+            return
+        self.preparing_audio = False
+        self.update_title()
+        source = audio
+        if error is not None:
+            logger.warning(f"Failed to prepare the music, playing it without fades: {error}")
+            source = music
+        self.player.setSource(QUrl.fromLocalFile(source))
+        self.player.play()
+        self.timer_preview.start(int(self.spin_duration.value() * 1000))
+
     def onTimeout(self):
         row = self.list_images.currentRow() + 1
         if row  == self.list_images.count():
-            self.player.stop()
-            self.timer_preview.stop()
-            self.is_previewing = False
+            self.stop_preview()
             self.update_buttons()
             self.list_images.setCurrentRow(self.preview_selection)
             self.list_images.setFocus()
@@ -762,36 +2762,80 @@ class MainWindow(QMainWindow):
         self.dialog_log.raise_()
 
     def onGenerate(self):
-        output, _ = QFileDialog.getSaveFileName(
-            self,
-            self.tr("Save video (MP4)"),
-            self.image_dir,
-            self.tr("Video file (*.mp4)")
-        )
-        if not output:
+        dialog = QFileDialog(self, self.tr("Save video (MP4)"), self.image_dir, self.tr("Video file (*.mp4)"))
+        dialog.setAcceptMode(QFileDialog.AcceptMode.AcceptSave)
+        dialog.setDefaultSuffix("mp4")
+        # NOTE: the native dialogs cannot be extended with the extra outputs
+        dialog.setOption(QFileDialog.Option.DontUseNativeDialog)
+        layout_extra = QHBoxLayout()
+        layout_extra.addWidget(QLabel(self.tr("Also save as:")))
+        extra_profiles = self.settings.value("export_extra_profiles", "").split(",")
+        checks: dict[str, QCheckBox] = {}
+        for index in range(self.combo_profile.count()):
+            profile = self.combo_profile.itemData(index)
+            if profile != self.profile:
+                checks[profile] = QCheckBox(self.combo_profile.itemText(index))
+                checks[profile].setChecked(profile in extra_profiles)
+                checks[profile].setToolTip(self.tr("Encoded from the same decoded images, saved next to the video with -{} in the name").format(profile))
+                layout_extra.addWidget(checks[profile])
+        layout_extra.addStretch()
+        dialog.layout().addLayout(layout_extra, dialog.layout().rowCount(), 0, 1, -1)
+        check_segments = QCheckBox(self.tr("Reuse the unchanged slides of earlier exports"))
+        check_segments.setToolTip(self.tr("Encodes every slide separately and caches it, re-exporting an edited board only encodes the changed slides"))
+        check_segments.setChecked(self.settings.value("export_segments", False, bool))
+        dialog.layout().addWidget(check_segments, dialog.layout().rowCount(), 0, 1, -1)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
             return
+        output = dialog.selectedFiles()[0]
+        self.settings.setValue("export_segments", check_segments.isChecked())
+        extra_profiles = [profile for profile, check in checks.items() if check.isChecked()]
+        self.settings.setValue("export_extra_profiles", ",".join(extra_profiles))
+        stem, extension = os.path.splitext(output)
+        extra_outputs = [(f"{stem}-{profile}{extension}", profile) for profile in extra_profiles]
 
         self.setWindowTitle(self.tr("{} (saving video)").format(QApplication.applicationName()))
         self.setEnabled(False)
         self.onLog()
         QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
 
-        images = [self.list_images.item(row).data(Qt.ItemDataRole.UserRole) for row in range(self.list_images.count())]
-        self.thread_generate.images = images
+        self.thread_generate.images = list(self.slides.paths)
         self.thread_generate.duration = self.spin_duration.value()
         self.thread_generate.music = self.music_file
         self.thread_generate.fade_in = self.fade_in
         self.thread_generate.fade_out = self.fade_out
         self.thread_generate.output = output
+        self.thread_generate.jobs = int(self.settings.value("convert_jobs", 0))
+        self.thread_generate.stream = self.settings.value("export_stream", True, bool)
+        self.thread_generate.profile = self.profile
+        self.thread_generate.compose = self.settings.value("export_compose", True, bool)
+        self.thread_generate.segment_cache = None
+        if self.settings.value("export_segments", False, bool):
+            segment_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "segments")
+            segment_mb = int(self.settings.value("segment_cache_mb", 4096))
+            self.thread_generate.segment_cache = ConversionCache(segment_dir, segment_mb * 1024 * 1024)
+        cache_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "images")
+        cache_mb = int(self.settings.value("conversion_cache_mb", 2048))
+        self.thread_generate.cache = ConversionCache(cache_dir, cache_mb * 1024 * 1024)
+        self.thread_generate.audio_cache = self.audio_cache()
+        self.thread_generate.extra_outputs = extra_outputs
+        self.dialog_log.set_progress({"stage": "", "percent": 0.0, "speed": 0.0, "eta": None})
         self.thread_generate.start()
 
+    def onGenerateProgress(self, progress: dict):
+        self.setWindowTitle(self.tr("{} (saving video: {})").format(QApplication.applicationName(), progress_text(progress)))
+        self.dialog_log.set_progress(progress)
+
     def onFinished(self):
         self.setEnabled(True)
         self.setWindowTitle(QApplication.applicationName())
+        self.dialog_log.set_progress(None)
         QApplication.restoreOverrideCursor()
 
         error = self.thread_generate.error
         if error is None:
+            thread = self.thread_generate
+            video_duration = thread.duration * len(thread.images)
+            self.export_timings[thread.profiles] = f"{thread.seconds:.1f}s for {video_duration:.0f}s of video ({video_duration / thread.seconds:.1f}x realtime)"
             self.dialog_log.hide()
             QDesktopServices.openUrl(QUrl.fromLocalFile(self.thread_generate.output))
         else:
@@ -802,20 +2846,306 @@ class MainWindow(QMainWindow):
             )
 
 
+def load_manifest(path: str):
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict):
+        raise ValueError("expected a JSON object")
+    # Relative paths are relative to the manifest
+    root = os.path.dirname(os.path.abspath(path))
+
+    def resolve(p: str):
+        return os.path.normpath(os.path.join(root, os.path.expanduser(p)))
+
+    def string(key: str):
+        value = manifest.get(key) or ""
+        if not isinstance(value, str):
+            raise ValueError(f"'{key}' must be a string")
+        return value
+
+    images = manifest.get("images")
+    if not isinstance(images, list) or len(images) == 0:
+        raise ValueError("'images' must be a non-empty list")
+    if not all(isinstance(image, str) and image for image in images):
+        raise ValueError("'images' must only contain paths")
+    duration = manifest.get("duration", 1.0)
+    # NOTE: bool is a subclass of int, NaN fails the range check
+    minimum, maximum = SLIDE_DURATION_RANGE
+    if not isinstance(duration, (int, float)) or isinstance(duration, bool) or not minimum <= duration <= maximum:
+        raise ValueError(f"'duration' must be a number from {minimum:g} to {maximum:g}")
+    fade_in = manifest.get("fade_in", False)
+    fade_out = manifest.get("fade_out", True)
+    if not isinstance(fade_in, bool) or not isinstance(fade_out, bool):
+        raise ValueError("'fade_in' and 'fade_out' must be true or false")
+    music = string("music")
+    output = string("output")
+    profile = string("profile")
+    if profile and profile not in EXPORT_PROFILES:
+        raise ValueError(f"unknown profile '{profile}' (expected one of: {', '.join(EXPORT_PROFILES)})")
+    fingerprints = manifest.get("fingerprints")
+    if not isinstance(fingerprints, list) or len(fingerprints) != len(images):
+        fingerprints = [None] * len(images)
+    for fingerprint in fingerprints:
+        # [size, mtime_ns] (see file_fingerprint), or null for a missing file
+        if fingerprint is not None and not (isinstance(fingerprint, list) and len(fingerprint) == 2 and all(type(value) is int for value in fingerprint)):
+            raise ValueError("'fingerprints' must only contain [size, mtime_ns] pairs")
+    return {
+        "images": [resolve(image) for image in images],
+        "fingerprints": fingerprints,
+        "duration": float(duration),
+        "music": resolve(music) if music else "",
+        "fade_in": fade_in,
+        "fade_out": fade_out,
+        "output": resolve(output) if output else "",
+        "profile": profile,
+    }
+
+
+class StartupProfile(QObject):
+    # Times the startup phases until the main window is painted, enabled with --startup-profile
+    def __init__(self) -> None:
+        super().__init__()
+        self.phases: list[tuple[str, float]] = []
+        self.last = STARTUP_TIME
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def wait_for_paint(self, app: QApplication):
+        app.installEventFilter(self)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if event.type() == QEvent.Type.Paint:
+            QApplication.instance().removeEventFilter(self)
+            # The other widgets are painted in the same event
+            QTimer.singleShot(0, self.onPainted)
+        return False
+
+    def onPainted(self):
+        self.mark("first paint")
+        total = sum(seconds for _, seconds in self.phases)
+        lines = [f"{phase:<24} {seconds * 1000:8.1f} ms {seconds / total * 100:5.1f}%" for phase, seconds in self.phases]
+        lines.append(f"{'total':<24} {total * 1000:8.1f} ms")
+        logger.info("Startup profile (since the numpy and Qt imports):\n" + "\n".join(lines))
+        QApplication.quit()
+
+
+def add_log_file(settings: QSettings):
+    # The full log, the log dialog only keeps the last lines
+    path = settings.value("log_file", "")
+    if not path:
+        return
+    max_bytes = int(settings.value("log_file_mb", 10)) * 1024 * 1024
+    try:
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=3, encoding="utf-8")
+    except OSError as x:
+        logger.warning(f"Could not open log file {path}: {x}")
+        return
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(handler)
+
+
+def file_fingerprint(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def save_project(path: str, images: list[str], duration: float, music: str, fade_in: bool, fade_out: bool, profile: str = DEFAULT_PROFILE):
+    # A project is a render manifest (see load_manifest) with the fingerprints of the images
+    root = os.path.dirname(os.path.abspath(path))
+
+    def relative(p: str):
+        try:
+            return os.path.relpath(p, root).replace(os.sep, "/")
+        except ValueError:  # different drive
+            return p
+
+    project = {
+        "version": PROJECT_VERSION,
+        "images": [relative(image) for image in images],
+        "fingerprints": [file_fingerprint(image) for image in images],
+        "duration": duration,
+        "music": relative(music) if music else "",
+        "fade_in": fade_in,
+        "fade_out": fade_out,
+        "profile": profile,
+    }
+    partial = f"{path}.partial"
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(project, f, indent=1)
+    os.replace(partial, path)
+
+
+def render_main(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="app.py render",
+        description="Render boards to video without the user interface. Prints one JSON object per board (and a summary) to stdout.",
+    )
+    parser.add_argument("manifests", nargs="+", help="board manifest (JSON with images, duration, music, fade_in, fade_out, profile and output)")
+    parser.add_argument("-o", "--output", help="output file (only with a single manifest)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of boards rendered concurrently (default: 1)")
+    parser.add_argument("--convert-jobs", type=int, default=0, help="image decoding threads per board (default: cores / jobs)")
+    parser.add_argument("--no-stream", action="store_true", help="convert the images to files instead of streaming them to ffmpeg")
+    parser.add_argument("--segments", action="store_true", help="encode every slide separately and reuse the unchanged ones from earlier renders")
+    parser.add_argument("--filter-blur", action="store_true", help="blur and scale every frame in ffmpeg instead of composing each slide once")
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome trace of the pipeline stages to FILE and print a summary to stderr")
+    parser.add_argument("--profile", choices=list(EXPORT_PROFILES), help=f"export profile (default: the manifest profile or {DEFAULT_PROFILE})")
+    args = parser.parse_args(argv)
+    if args.output and len(args.manifests) > 1:
+        parser.error("--output can only be used with a single manifest")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    # NOTE: no widgets are created, so this works without a display
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QGuiApplication([sys.argv[0]])
+    app.setOrganizationName("Ogilvie")
+    app.setOrganizationDomain("ogilvie.pl")
+    app.setApplicationName("LiveVisionBoard")
+
+    tracer.enabled = bool(args.trace)
+    add_log_file(QSettings())
+
+    def report(result: dict):
+        print(json.dumps(result), flush=True)
+
+    status = 0
+    boards = []
+    for path in args.manifests:
+        try:
+            board = load_manifest(path)
+            if args.output:
+                board["output"] = os.path.abspath(args.output)
+            if args.profile:
+                board["profile"] = args.profile
+            elif not board["profile"]:
+                board["profile"] = DEFAULT_PROFILE
+            if not board["output"]:
+                raise ValueError("no output file (set 'output' or pass --output)")
+            boards.append((path, board))
+        except (OSError, ValueError) as x:
+            report({"manifest": path, "status": "invalid", "error": str(x)})
+            status = 2
+
+    convert_jobs = args.convert_jobs
+    if convert_jobs <= 0:
+        convert_jobs = max(1, (os.cpu_count() or 1) // args.jobs)
+    cache = None
+    if args.no_stream:
+        cache_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "images")
+        cache_mb = int(QSettings().value("conversion_cache_mb", 2048))
+    if args.segments:
+        segment_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "segments")
+        segment_mb = int(QSettings().value("segment_cache_mb", 4096))
+    # Boards with the same music and length share the prepared audio
+    audio_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "audio")
+    audio_mb = int(QSettings().value("audio_cache_mb", 512))
+
+    def render(board: dict):
+        start = time.perf_counter()
+        board_cache = None
+        if args.no_stream:
+            board_cache = ConversionCache(cache_dir, cache_mb * 1024 * 1024)
+        segment_cache = None
+        if args.segments:
+            segment_cache = ConversionCache(segment_dir, segment_mb * 1024 * 1024)
+        error = generate_video(
+            board["images"],
+            board["duration"],
+            board["music"],
+            board["fade_in"],
+            board["fade_out"],
+            board["output"],
+            convert_jobs,
+            not args.no_stream,
+            board_cache,
+            board["profile"],
+            segment_cache=segment_cache,
+            compose=not args.filter_blur,
+            audio_cache=ConversionCache(audio_dir, audio_mb * 1024 * 1024),
+        )
+        return error, time.perf_counter() - start
+
+    start = time.perf_counter()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(render, board): (path, board) for path, board in boards}
+        for future in as_completed(futures):
+            path, board = futures[future]
+            try:
+                error, seconds = future.result()
+            except Exception as x:
+                error, seconds = f"{type(x).__name__}: {x}", None
+            if error is not None:
+                failed += 1
+            report({
+                "manifest": path,
+                "output": board["output"],
+                "status": "ok" if error is None else "failed",
+                "error": error,
+                "images": len(board["images"]),
+                "profile": board["profile"],
+                "seconds": None if seconds is None else round(seconds, 3),
+            })
+    if args.trace:
+        tracer.write(args.trace)
+        print(tracer.summary(), file=sys.stderr)
+    report({
+        "status": "done",
+        "boards": len(boards),
+        "failed": failed,
+        "seconds": round(time.perf_counter() - start, 3),
+    })
+    if failed > 0:
+        status = max(status, 1)
+    return status
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "render":
+        return render_main(sys.argv[2:])
+
+    # Logs the time to the first paint and quits
+    startup = StartupProfile() if "--startup-profile" in sys.argv[1:] else None
+    if startup:
+        startup.mark("imports")
     app = QApplication(sys.argv)
     app.setOrganizationName("Ogilvie")
     app.setOrganizationDomain("ogilvie.pl")
     app.setApplicationName("LiveVisionBoard")
+    if startup:
+        startup.mark("QApplication")
+    # Timing spans for every pipeline stage, see Tracer
+    add_log_file(QSettings())
+    trace_file = QSettings().value("trace_file", "")
+    tracer.enabled = bool(trace_file)
+    if startup:
+        startup.mark("settings and log file")
     main = MainWindow()
+    if startup:
+        startup.mark("main window")
+        startup.wait_for_paint(app)
     main.show()
     main.raise_()
+    if startup:
+        startup.mark("show")
     app.exec()
+    # Keep the hashes that were computed so far
+    main.hash_index.cancel()
+    main.wait_for_audio()
+    if trace_file:
+        tracer.write(trace_file)
 
 
 if __name__ == "__main__":
     TMP_DIR = tempfile.mkdtemp("LiveVisionBoard")
     try:
-        main()
+        status = main()
     finally:
         shutil.rmtree(TMP_DIR, ignore_errors=True)
+    sys.exit(status)
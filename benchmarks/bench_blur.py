@@ -0,0 +1,93 @@
+# Compares the NumPy blur in app.py with the QGraphicsScene blur it replaced.
+# Usage: python benchmarks/bench_blur.py [--repeat N]
+import os
+import sys
+import time
+import math
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from PySide6.QtCore import Qt, QSize, QRectF
+from PySide6.QtGui import QImage, QPixmap, QPainter, QColor
+from PySide6.QtWidgets import (
+    QApplication,
+    QGraphicsBlurEffect,
+    QGraphicsScene,
+    QGraphicsPixmapItem,
+)
+
+import app
+
+
+def scene_blur(pixmap: QPixmap, radius: float):
+    # The original MainWindow.blur_image
+    scene = QGraphicsScene()
+    item = QGraphicsPixmapItem()
+    item.setPixmap(pixmap)
+    blur = QGraphicsBlurEffect(scene)
+    blur.setBlurRadius(radius)
+    blur.setBlurHints(QGraphicsBlurEffect.BlurHint.QualityHint)
+    item.setGraphicsEffect(blur)
+    scene.addItem(item)
+    blurred = QPixmap(pixmap.size())
+    blurred.fill(Qt.GlobalColor.transparent)
+    with QPainter(blurred) as painter:
+        scene.render(painter, QRectF(), QRectF(0, 0, pixmap.width(), pixmap.height()))
+    return blurred
+
+
+def synthetic_image(width: int, height: int):
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    image.fill(QColor(40, 90, 160))
+    with QPainter(image) as painter:
+        for i in range(20):
+            color = QColor.fromHsv(i * 18, 200, 230)
+            painter.fillRect(i * width // 25, i * height // 30, width // 5, height // 4, color)
+    return image
+
+
+def pixels(image: QImage):
+    image = image.convertToFormat(QImage.Format.Format_RGBA8888_Premultiplied)
+    return np.frombuffer(image.constBits(), np.uint8).reshape(image.height(), image.width(), 4).astype(np.float32)
+
+
+def measure(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    QApplication(sys.argv)
+    source = synthetic_image(4000, 3000)
+    print(f"{'size':>10} {'scene (ms)':>11} {'numpy (ms)':>11} {'speedup':>8} {'mean diff':>10}")
+    for size in [QSize(120, 68), QSize(960, 540), QSize(1280, 720), QSize(1920, 1080)]:
+        # The compositor gets images that were already decoded at the target size (see read_scaled)
+        image = source.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+        def old():
+            blurred = QPixmap.fromImage(image).scaled(size)
+            blurred = scene_blur(blurred, 50)
+            return scene_blur(blurred, 20).toImage()
+
+        def new():
+            return app.blur_image(image, math.hypot(50, 20), size)
+
+        old_time, old_image = measure(old, args.repeat)
+        new_time, new_image = measure(new, args.repeat)
+        diff = np.abs(pixels(old_image) - pixels(new_image)).mean()
+        print(f"{size.width():>5}x{size.height():<4} {old_time * 1000:>11.1f} {new_time * 1000:>11.1f} {old_time / new_time:>7.1f}x {diff:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
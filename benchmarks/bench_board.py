@@ -0,0 +1,246 @@
+# Times the board pipeline on synthetic boards: thumbnails, preview selection, caches and export.
+# Usage: python benchmarks/bench_board.py [--counts 20 100] [--megapixels 2 12] [--formats jpg png]
+#                                         [--no-export] [--output results.json] [--baseline old.json]
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import itertools
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from PySide6 import __version__ as pyside_version
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage, QPainter, QColor, QFont
+from PySide6.QtWidgets import QApplication, QMessageBox
+
+import app
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ASPECT_RATIOS = [(4, 3), (3, 2), (16, 9), (3, 4), (9, 16), (1, 1)]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # NOTE: kilobytes on Linux, bytes on macOS
+    if sys.platform == "darwin":
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def synthetic_image(width: int, height: int, seed: int):
+    # Smooth noise with some sharp shapes, so the JPEG/PNG decoders have realistic work to do
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, (max(1, height // 32), max(1, width // 32), 4), np.uint8)
+    noise[:, :, 3] = 255
+    small = QImage(noise.data, noise.shape[1], noise.shape[0], noise.shape[1] * 4, QImage.Format.Format_RGBA8888)
+    image = small.scaled(width, height, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    image = image.convertToFormat(QImage.Format.Format_RGB32)
+    with QPainter(image) as painter:
+        for i in range(12):
+            color = QColor.fromHsv((seed * 37 + i * 30) % 360, 200, 230)
+            painter.fillRect(i * width // 14, i * height // 16, width // 6, height // 5, color)
+        font = QFont()
+        font.setPixelSize(max(8, height // 8))
+        painter.setFont(font)
+        painter.drawText(image.rect(), Qt.AlignmentFlag.AlignCenter, str(seed))
+    return image
+
+
+def generate_board(directory: str, count: int, megapixels: float, format: str):
+    paths = []
+    for i in range(count):
+        aspect_w, aspect_h = ASPECT_RATIOS[i % len(ASPECT_RATIOS)]
+        width = round((megapixels * 1000000 * aspect_w / aspect_h) ** 0.5)
+        height = round(megapixels * 1000000 / width)
+        path = os.path.join(directory, f"image{i:05d}.{format}")
+        if not synthetic_image(width, height, i).save(path, quality=90 if format == "jpg" else 100):
+            raise RuntimeError(f"Failed to save {path}")
+        paths.append(path)
+    return paths
+
+
+def percentiles(timings: list[float]):
+    timings = sorted(timings)
+    if not timings:
+        return {}
+
+    def at(p: float):
+        return round(timings[min(len(timings) - 1, int(p * len(timings)))] * 1000, 2)
+
+    return {"p50_ms": at(0.5), "p95_ms": at(0.95), "max_ms": round(timings[-1] * 1000, 2)}
+
+
+def wait(qapp: QApplication, condition, timeout: float):
+    end = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > end:
+            raise TimeoutError("timed out waiting for the board")
+        qapp.processEvents()
+        time.sleep(0.001)
+
+
+def bench_board(qapp: QApplication, paths: list[str], args: argparse.Namespace):
+    result = {}
+    window = app.MainWindow()
+    window.show()
+    qapp.processEvents()
+
+    # Thumbnails: the time add_images blocks the GUI, and the time until the visible icons are rendered
+    start = time.perf_counter()
+    window.add_images(paths)
+    result["add_images_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    def thumbnails_visible():
+        rows = window.list_images.visibleRows()
+        return rows and all(window.slides.keys[row] in window.slides.icons for row in rows)
+
+    wait(qapp, thumbnails_visible, args.timeout)
+    result["thumbnails_s"] = round(time.perf_counter() - start, 3)
+
+    # Preview selection: the first pass decodes and composes, the second pass should hit the caches
+    for name in ["select_cold", "select_warm"]:
+        timings = []
+        for row in range(window.list_images.count()):
+            start = time.perf_counter()
+            window.list_images.setCurrentRow(row)
+            timings.append(time.perf_counter() - start)
+            qapp.processEvents()
+        result[name] = percentiles(timings)
+    for name, cache in [("image_cache", window.image_cache), ("composite_cache", window.composite_cache), ("thumbnail_cache", window.slides.icons)]:
+        result[name] = {"hits": cache.hits, "misses": cache.misses, "evictions": cache.evictions, "stats": cache.stats()}
+    result["peak_rss_mb_gui"] = peak_rss_mb()
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
+
+    if args.export:
+        work_dir = tempfile.mkdtemp(prefix="bench-export-")
+        try:
+            for mode in args.modes:
+                output = os.path.join(work_dir, f"{mode}.mp4")
+                cache = None
+                segment_cache = None
+                if mode == "files":
+                    cache = app.ConversionCache(os.path.join(work_dir, "images"), 1 << 40)
+                elif mode == "segments":
+                    segment_cache = app.ConversionCache(os.path.join(work_dir, "segments"), 1 << 40)
+                start = time.perf_counter()
+                error = app.generate_video(
+                    paths, args.duration, "", False, False, output, 0, mode == "stream", cache, args.profile,
+                    segment_cache=segment_cache,
+                )
+                seconds = time.perf_counter() - start
+                video_duration = args.duration * len(paths)
+                result[f"export_{mode}"] = {
+                    "error": error,
+                    "seconds": round(seconds, 3),
+                    "realtime": round(video_duration / seconds, 2),
+                    "bytes": os.path.getsize(output) if error is None else None,
+                }
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        result["peak_rss_mb_export"] = peak_rss_mb()
+    return result
+
+
+def compare(results: list[dict], baseline_path: str):
+    # Prints the timings that changed compared to an earlier run of the same boards
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {board["name"]: board for board in json.load(f)["boards"]}
+
+    def timings(prefix: str, value):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                yield from timings(f"{prefix}.{key}", child)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and prefix.endswith(("_ms", "_s", ".seconds")) and not prefix.endswith("_per_s"):
+            yield prefix, value
+
+    print(f"{'board':>24} {'metric':>28} {'baseline':>10} {'current':>10} {'change':>8}")
+    for board in results:
+        old = baseline.get(board["name"])
+        if old is None:
+            continue
+        old_timings = dict(timings("", old))
+        for metric, value in timings("", board):
+            before = old_timings.get(metric)
+            if before:
+                print(f"{board['name']:>24} {metric[1:]:>28} {before:>10} {value:>10} {(value / before - 1) * 100:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[20, 100], help="images per board")
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[2, 12], help="image sizes")
+    parser.add_argument("--formats", nargs="+", default=["jpg", "png"], choices=["jpg", "png"])
+    parser.add_argument("--modes", nargs="+", default=["stream", "files", "segments"], choices=["stream", "files", "segments"], help="export modes")
+    parser.add_argument("--profile", default="draft", choices=list(app.EXPORT_PROFILES))
+    parser.add_argument("--duration", type=float, default=0.5, help="seconds per slide in the export")
+    parser.add_argument("--no-export", dest="export", action="store_false", help="skip the ffmpeg exports")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds to wait for the thumbnails")
+    parser.add_argument("--dir", help="keep the generated boards in this directory (default: a temporary directory)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results of an earlier run")
+    args = parser.parse_args()
+
+    qapp = QApplication(sys.argv)
+    # Separate settings, so the benchmark does not touch the settings of the real application
+    qapp.setOrganizationName("Ogilvie")
+    qapp.setApplicationName("LiveVisionBoard-bench")
+    QMessageBox.critical = staticmethod(lambda parent, title, text, *rest: print(f"error: {text}", file=sys.stderr))
+    if args.export:
+        _, error = app.find_ffmpeg()
+        if error is not None:
+            parser.error(f"{error} (use --no-export to skip the exports)")
+
+    root = args.dir or tempfile.mkdtemp(prefix="bench-boards-")
+    results = []
+    try:
+        for count, megapixels, format in itertools.product(args.counts, args.megapixels, args.formats):
+            name = f"{count}x{megapixels:g}mp-{format}"
+            directory = os.path.join(root, name)
+            os.makedirs(directory, exist_ok=True)
+            start = time.perf_counter()
+            paths = generate_board(directory, count, megapixels, format)
+            print(f"{name}: generated in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            board = {"name": name, "count": count, "megapixels": megapixels, "format": format}
+            board.update(bench_board(qapp, paths, args))
+            results.append(board)
+            print(json.dumps(board), flush=True)
+    finally:
+        if not args.dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "pyside": pyside_version,
+            "cpus": os.cpu_count(),
+        },
+        "settings": {"profile": args.profile, "duration": args.duration, "modes": args.modes if args.export else []},
+        "peak_rss_mb": peak_rss_mb(),
+        "boards": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Run with: python -m pytest tests
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from PySide6.QtCore import Qt, QPoint
+from PySide6.QtGui import QImage, QColor, QPainter, QLinearGradient
+
+from app import HammingIndex, duplicate_groups, perceptual_hash
+
+
+def brute_force_groups(hashes: list[int], distance: int):
+    # Connected components of the rows within the distance
+    groups = []
+    seen = set()
+    for row in range(len(hashes)):
+        if row in seen:
+            continue
+        group = [row]
+        seen.add(row)
+        for member in group:
+            for other in range(len(hashes)):
+                if other not in seen and (hashes[member] ^ hashes[other]).bit_count() <= distance:
+                    seen.add(other)
+                    group.append(other)
+        if len(group) > 1:
+            groups.append(sorted(group))
+    return groups
+
+
+def random_hashes(seed: int):
+    # Clusters of nearby hashes, so every distance has matches and misses
+    rng = random.Random(seed)
+    hashes = []
+    for _ in range(40):
+        center = rng.getrandbits(64)
+        for _ in range(rng.randint(1, 4)):
+            flips = rng.sample(range(64), rng.randint(0, 12))
+            hashes.append(center ^ sum(1 << bit for bit in flips))
+    rng.shuffle(hashes)
+    return hashes
+
+
+def test_hamming_index():
+    hashes = random_hashes(1)
+    for distance in range(65):
+        index = HammingIndex(distance)
+        for i, hash in enumerate(hashes):
+            expected = {j for j in range(i) if (hashes[j] ^ hash).bit_count() <= distance}
+            assert set(index.add(hash)) == expected
+
+
+def test_duplicate_groups():
+    for seed in range(3):
+        hashes = random_hashes(seed)
+        for distance in range(65):
+            assert duplicate_groups(hashes, distance) == brute_force_groups(hashes, distance)
+
+
+def test_duplicate_groups_skip_missing():
+    assert duplicate_groups([5, None, 5, None], 0) == [[0, 2]]
+
+
+def solid(color: QColor):
+    image = QImage(320, 240, QImage.Format.Format_RGB32)
+    image.fill(color)
+    return image
+
+
+def gradient(start: QColor, end: QColor):
+    image = QImage(320, 240, QImage.Format.Format_RGB32)
+    with QPainter(image) as painter:
+        fill = QLinearGradient(QPoint(0, 0), QPoint(320, 0))
+        fill.setColorAt(0, start)
+        fill.setColorAt(1, end)
+        painter.fillRect(image.rect(), fill)
+    return image
+
+
+def test_flat_images():
+    colors = [Qt.GlobalColor.black, Qt.GlobalColor.white, Qt.GlobalColor.red, Qt.GlobalColor.green, Qt.GlobalColor.blue, Qt.GlobalColor.gray]
+    hashes = [perceptual_hash(solid(QColor(color))) for color in colors]
+    assert duplicate_groups(hashes, 6) == []
+    # The same flat color is still a duplicate
+    assert duplicate_groups(hashes + [perceptual_hash(solid(QColor(Qt.GlobalColor.red)))], 6) == [[2, 6]]
+
+
+def test_gradients():
+    pairs = [(Qt.GlobalColor.black, Qt.GlobalColor.white), (Qt.GlobalColor.black, Qt.GlobalColor.red), (Qt.GlobalColor.blue, Qt.GlobalColor.yellow)]
+    hashes = [perceptual_hash(gradient(QColor(start), QColor(end))) for start, end in pairs]
+    assert duplicate_groups(hashes, 6) == []
+
+
+def test_scaled_copy():
+    image = gradient(QColor(Qt.GlobalColor.blue), QColor(Qt.GlobalColor.yellow))
+    with QPainter(image) as painter:
+        painter.fillRect(40, 30, 100, 80, QColor(Qt.GlobalColor.darkGreen))
+    copy = image.scaled(160, 120, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    assert duplicate_groups([perceptual_hash(image), perceptual_hash(copy)], 6) == [[0, 1]]
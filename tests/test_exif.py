@@ -0,0 +1,65 @@
+# Run with: python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import parse_exif_time, exif_capture_time
+
+DATE = b"2021:06:05 14:30:00\0"
+
+
+def make_tiff(order: str = "little"):
+    # IFD0 with a single DateTime entry, the value follows the IFD
+    prefix = b"II" if order == "little" else b"MM"
+
+    def integer(value: int, size: int):
+        return value.to_bytes(size, order)
+
+    value_offset = 8 + 2 + 12 + 4
+    ifd0 = integer(1, 2) + integer(0x0132, 2) + integer(2, 2) + integer(len(DATE), 4) + integer(value_offset, 4) + integer(0, 4)
+    return prefix + integer(42, 2) + integer(8, 4) + ifd0 + DATE
+
+
+def make_jpeg(segment: bytes):
+    return b"\xff\xd8" + segment + b"\xff\xd9"
+
+
+def app1(payload: bytes):
+    return b"\xff\xe1" + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+def write(tmp_path, name: str, data: bytes):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_parse_exif_time():
+    assert parse_exif_time(make_tiff("little")) == "2021:06:05 14:30:00"
+    assert parse_exif_time(make_tiff("big")) == "2021:06:05 14:30:00"
+
+
+def test_parse_exif_time_truncated():
+    tiff = make_tiff()
+    # NOTE: without the trailing NUL the date is still complete
+    for end in range(len(tiff) - 1):
+        assert parse_exif_time(tiff[:end]) is None
+
+
+def test_exif_capture_time(tmp_path):
+    path = write(tmp_path, "ok.jpg", make_jpeg(app1(b"Exif\0\0" + make_tiff())))
+    assert exif_capture_time(path) == "2021:06:05 14:30:00"
+
+
+def test_exif_capture_time_truncated(tmp_path):
+    data = make_jpeg(app1(b"Exif\0\0" + make_tiff()))
+    for end in range(len(data) - 3):
+        assert exif_capture_time(write(tmp_path, "truncated.jpg", data[:end])) is None
+
+
+def test_exif_capture_time_zero_length(tmp_path):
+    for marker in [b"\xe1", b"\xe0"]:
+        for length in [b"\x00\x00", b"\x00\x01"]:
+            path = write(tmp_path, "zero.jpg", b"\xff\xd8\xff" + marker + length)
+            assert exif_capture_time(path) is None
@@ -0,0 +1,77 @@
+# Run with: python -m pytest tests
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import load_manifest, save_project
+
+
+def write(tmp_path, manifest):
+    path = tmp_path / "board.json"
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+    return str(path)
+
+
+def test_load_manifest(tmp_path):
+    path = write(tmp_path, {"images": ["a.jpg", "sub/b.png"], "duration": 2, "music": "music.mp3", "fade_in": True, "profile": "draft"})
+    board = load_manifest(path)
+    assert board["images"] == [str(tmp_path / "a.jpg"), str(tmp_path / "sub" / "b.png")]
+    assert board["fingerprints"] == [None, None]
+    assert board["duration"] == 2.0
+    assert board["music"] == str(tmp_path / "music.mp3")
+    assert board["fade_in"] is True
+    assert board["fade_out"] is True
+    assert board["output"] == ""
+    assert board["profile"] == "draft"
+
+
+def test_project_round_trip(tmp_path):
+    image = tmp_path / "a.jpg"
+    image.write_bytes(b"\xff\xd8\xff\xd9")
+    path = str(tmp_path / "board.lvb")
+    save_project(path, [str(image), str(tmp_path / "missing.jpg")], 1.5, "", False, False, "archival")
+    board = load_manifest(path)
+    assert board["images"] == [str(image), str(tmp_path / "missing.jpg")]
+    assert board["fingerprints"][0] == [4, os.stat(image).st_mtime_ns]
+    assert board["fingerprints"][1] is None
+    assert (board["duration"], board["fade_in"], board["fade_out"], board["profile"]) == (1.5, False, False, "archival")
+
+
+@pytest.mark.parametrize("manifest", [
+    [],
+    {},
+    {"images": []},
+    {"images": "a.jpg"},
+    {"images": [1, 2]},
+    {"images": [""]},
+    {"images": ["a.jpg"], "duration": None},
+    {"images": ["a.jpg"], "duration": "2"},
+    {"images": ["a.jpg"], "duration": True},
+    {"images": ["a.jpg"], "duration": 0},
+    {"images": ["a.jpg"], "duration": 1e-4},
+    {"images": ["a.jpg"], "duration": 61},
+    {"images": ["a.jpg"], "duration": float("inf")},
+    {"images": ["a.jpg"], "duration": float("nan")},
+    {"images": ["a.jpg"], "fade_in": "false"},
+    {"images": ["a.jpg"], "fade_out": 0},
+    {"images": ["a.jpg"], "music": 3},
+    {"images": ["a.jpg"], "output": ["out.mp4"]},
+    {"images": ["a.jpg"], "profile": "cinema"},
+    {"images": ["a.jpg"], "fingerprints": [5]},
+    {"images": ["a.jpg"], "fingerprints": [[1, "2"]]},
+    {"images": ["a.jpg"], "fingerprints": [[1, 2, 3]]},
+])
+def test_load_manifest_invalid(tmp_path, manifest):
+    with pytest.raises(ValueError):
+        load_manifest(write(tmp_path, manifest))
+
+
+def test_load_manifest_not_json(tmp_path):
+    path = tmp_path / "board.json"
+    path.write_text("{", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_manifest(str(path))